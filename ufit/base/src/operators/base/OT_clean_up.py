@@ -1,4 +1,3 @@
-from ..utils import general
 from .....base.src.operators.core.OT_base import OTBase
 from .....base.src.operators.core.prepare import (clean_up, verify_clean_up, highlight_next_non_manifold,
                                                   fill_non_manifold, delete_non_manifold)
@@ -44,8 +43,8 @@ class OTFillNonManifold(OTBase):
                 and active_object.type == 'MESH' \
                 and active_object.name == 'uFit' \
                 and active_object.mode == 'EDIT':
-            selected_vertices = general.get_selected_vertices(context)
-            if len(selected_vertices) > 3:
+            # count of the selected vertices of the edit mesh, without reading the mesh
+            if active_object.data.total_vert_sel > 3:
                 return True
 
     def main_func(self, context):
@@ -61,8 +60,8 @@ class OTDeleteNonManifold(OTBase):
                 and active_object.type == 'MESH' \
                 and active_object.name == 'uFit' \
                 and active_object.mode == 'EDIT':
-            selected_vertices = general.get_selected_vertices(context)
-            if len(selected_vertices) > 0:
+            # count of the selected vertices of the edit mesh, without reading the mesh
+            if active_object.data.total_vert_sel > 0:
                 return True
 
     def main_func(self, context):
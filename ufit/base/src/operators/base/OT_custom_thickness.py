@@ -9,12 +9,12 @@ class OTCustomThickness(OTBase):
     @classmethod
     def poll(cls, context):
         active_object = context.active_object
-        selected_verts = color_attributes.get_vertices_by_color_exclude_simple(active_object, color_attr_select, Vector((1, 1, 1, 1)))
         if active_object is not None \
                 and active_object.type == 'MESH' \
                 and active_object.name == 'uFit' \
                 and active_object.mode == 'VERTEX_PAINT' \
-                and len(selected_verts) > 25:
+                and color_attributes.count_vertices_by_color_exclude(active_object, color_attr_select,
+                                                                     Vector((1, 1, 1, 1))) > 25:
             return True
 
     def main_func(self, context):
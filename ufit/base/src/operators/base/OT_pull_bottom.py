@@ -22,7 +22,7 @@ class OTPullBottom(OTBase):
         pull_bottom(context, extrusion)
 
         # remeasure circumferences
-        remeasure_circumferences(context)
+        remeasure_circumferences(context, only_dirty=True)
 
 
 class OTPullBottomDone(OTBase):
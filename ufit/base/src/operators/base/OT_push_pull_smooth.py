@@ -19,12 +19,12 @@ class OTPushPullRegion(OTBase):
     def poll(cls, context):
         # check if there is an ufit object and a vertex is selected
         active_object = context.active_object
-        selected_verts = color_attributes.get_vertices_by_color_exclude_simple(active_object, color_attr_select, Vector((1, 1, 1, 1)))
         if active_object is not None \
                 and active_object.type == 'MESH' \
                 and active_object.mode == 'VERTEX_PAINT' \
                 and active_object.name == 'uFit' \
-                and len(selected_verts) > 25:
+                and color_attributes.count_vertices_by_color_exclude(active_object, color_attr_select,
+                                                                     Vector((1, 1, 1, 1))) > 25:
             return True
 
     def main_func(self, context):
@@ -40,7 +40,7 @@ class OTPushPullRegion(OTBase):
             push_pull_region(context, extrusion)
 
         # remeasure circumferences
-        remeasure_circumferences(context)
+        remeasure_circumferences(context, only_dirty=True)
 
 
 class OTSmoothRegion(OTBase):
@@ -48,12 +48,12 @@ class OTSmoothRegion(OTBase):
     def poll(cls, context):
         # check if there is an ufit object and a vertex is selected
         active_object = context.active_object
-        selected_verts = color_attributes.get_vertices_by_color_exclude_simple(active_object, color_attr_select, Vector((1, 1, 1, 1)))
         if active_object is not None \
                 and active_object.type == 'MESH' \
                 and active_object.mode == 'VERTEX_PAINT' \
                 and active_object.name == 'uFit' \
-                and len(selected_verts) > 25:
+                and color_attributes.count_vertices_by_color_exclude(active_object, color_attr_select,
+                                                                     Vector((1, 1, 1, 1))) > 25:
             return True
 
     def main_func(self, context):
@@ -61,7 +61,7 @@ class OTSmoothRegion(OTBase):
         smooth_region(context)
 
         # remeasure circumferences
-        remeasure_circumferences(context)
+        remeasure_circumferences(context, only_dirty=True)
 
 
 class OTFreeSculptCheckpoint(OTBase):
@@ -21,7 +21,8 @@ class OTBase(bpy.types.Operator):
         try:
             # add checkpoint
             if checkpoint:
-                add_checkpoint(context, checkpoint['name'], path_consts, ui_consts, checkpoint.get('sub_steps'))
+                add_checkpoint(context, checkpoint['name'], path_consts, ui_consts, checkpoint.get('sub_steps'),
+                               deltas=checkpoint.get('deltas', False))
 
             # execute func
             self.main_func(context)
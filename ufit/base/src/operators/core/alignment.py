@@ -1,7 +1,7 @@
 import os
 import bpy
 from mathutils import Vector
-from ..utils import annotations, general, user_interface
+from ..utils import annotations, general, user_interface, transforms
 
 
 #########################################
@@ -25,7 +25,7 @@ def import_connector(context, path_consts, connector_type, foot_type, amputation
 
     # switch origin to center of mass
     ufit_obj = bpy.data.objects['uFit']
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
+    transforms.set_origin_to_center_of_mass(ufit_obj)
 
     # move the object to origin of world
     anchor_point = Vector((ufit_obj.location.x, ufit_obj.location.y, 0))
@@ -35,14 +35,10 @@ def import_connector(context, path_consts, connector_type, foot_type, amputation
     if context.scene.ufit_device_type == 'transfemoral':
         default_z_loc = 0.6
 
+    transforms.set_origins_world(objs, anchor_point)
+    transforms.translate_objects(objs, -anchor_point + Vector((0, 0, default_z_loc)))  # bring to the center and up
     for obj in objs:
-        obj.hide_set(False)
-        general.activate_object(context, obj, mode='OBJECT')
-        general.set_object_origin(anchor_point)
-        general.move_object(obj, -anchor_point)  # bring to the center
-        general.move_object(obj, Vector((0, 0, default_z_loc)))  # move up
-        if obj.name != 'uFit':
-            obj.hide_set(True)
+        obj.hide_set(obj.name != 'uFit')
 
     # go to object mode
     general.activate_object(context, ufit_obj, mode='OBJECT')
@@ -404,7 +400,7 @@ def create_ufit_inside(context, ufit_obj, conn_obj):
     voxel_remesh.voxel_size = 0.0005  # Set the voxel size
 
     # set the origin to the center of the object and scale
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
+    transforms.set_origin_to_center_of_mass(ufit_inside)
     ufit_inside.scale = (0.99, 0.99, 0.99)
 
     # apply the remesh modifier
@@ -0,0 +1,121 @@
+import json
+import bpy
+
+# Partial checkpoints only contain the datablocks needed to restore the workflow (the uFit objects with their
+# meshes, vertex groups and materials, the annotations and the ufit_* scene properties), not the UI, workspaces,
+# brushes, ... of the main file. They are restored by appending the datablocks into a clean session.
+PARTIAL_SUFFIX = '.partial.blend'
+OBJECT_PREFIXES = ('uFit', 'Circum_', 'Connector', 'Foot')
+STATE_TEXT_NAME = 'uFit_checkpoint_state'
+
+
+def is_partial_checkpoint(file_path):
+    return file_path.endswith(PARTIAL_SUFFIX)
+
+
+def get_scene_properties(scene):
+    props = {}
+    for prop in scene.bl_rna.properties:
+        name = prop.identifier
+        if not name.startswith('ufit_') or prop.is_readonly and prop.type != 'COLLECTION':
+            continue
+
+        value = getattr(scene, name)
+        if prop.type == 'COLLECTION':
+            props[name] = [{p.identifier: getattr(item, p.identifier) for p in item.bl_rna.properties
+                            if p.identifier != 'rna_type'}
+                           for item in value]
+        elif prop.type == 'ENUM':
+            # dynamic enums have no static items and are recalculated anyway
+            if not prop.is_enum_flag and value in prop.enum_items:
+                props[name] = prop.enum_items[value].value
+        elif prop.type == 'POINTER':
+            continue
+        elif getattr(prop, 'is_array', False):
+            props[name] = list(value)
+        else:
+            props[name] = value
+
+    return props
+
+
+def set_scene_properties(scene, props):
+    for name, value in props.items():
+        prop = scene.bl_rna.properties.get(name)
+        if prop is None:
+            continue
+
+        if prop.type == 'COLLECTION':
+            collection = getattr(scene, name)
+            collection.clear()
+            for item_props in value:
+                item = collection.add()
+                for key, item_value in item_props.items():
+                    setattr(item, key, item_value)
+        else:
+            scene[name] = value  # set as ID property, so the update callbacks are not triggered
+
+
+def write_checkpoint(context, file_path):
+    scene = context.scene
+    objects = {obj for obj in scene.objects if obj.name.startswith(OBJECT_PREFIXES)}
+
+    # the mesh data does not contain the edit mode changes yet
+    for obj in objects:
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+
+    state = {
+        'scene_properties': get_scene_properties(scene),
+        'hidden_objects': [obj.name for obj in objects if obj.hide_get()],
+        'active_object': context.active_object.name if context.active_object in objects else None,
+        'grease_pencil': scene.grease_pencil.name if scene.grease_pencil else None,
+        'length_unit': scene.unit_settings.length_unit,
+    }
+    state_text = bpy.data.texts.new(STATE_TEXT_NAME)
+    state_text.write(json.dumps(state))
+
+    datablocks = objects | {state_text}
+    if scene.grease_pencil:
+        datablocks.add(scene.grease_pencil)
+
+    try:
+        bpy.data.libraries.write(file_path, datablocks, fake_user=True)
+    finally:
+        bpy.data.texts.remove(state_text)
+
+
+def restore_checkpoint(file_path):
+    # start from a clean session
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+
+    with bpy.data.libraries.load(file_path, link=False) as (data_from, data_to):
+        data_to.objects = list(data_from.objects)
+        data_to.grease_pencils = list(data_from.grease_pencils)
+        data_to.texts = [name for name in data_from.texts if name.startswith(STATE_TEXT_NAME)]
+
+    if not data_to.texts:
+        raise Exception('The checkpoint does not contain the uFit state.')
+    state_text = data_to.texts[0]
+    state = json.loads(state_text.as_string())
+    bpy.data.texts.remove(state_text)
+
+    # objects
+    for obj in data_to.objects:
+        obj.use_fake_user = False
+        scene.collection.objects.link(obj)
+    for obj in data_to.objects:
+        obj.hide_set(obj.name in state['hidden_objects'])
+    if state['active_object']:
+        bpy.context.view_layer.objects.active = bpy.data.objects[state['active_object']]
+
+    # annotations
+    for gp in data_to.grease_pencils:
+        gp.use_fake_user = False
+    if state['grease_pencil']:
+        scene.grease_pencil = bpy.data.grease_pencils[state['grease_pencil']]
+
+    # scene settings
+    scene.unit_settings.length_unit = state['length_unit']
+    set_scene_properties(scene, state['scene_properties'])
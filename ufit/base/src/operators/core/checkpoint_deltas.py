@@ -0,0 +1,201 @@
+import os
+import json
+import hashlib
+import bpy
+import numpy as np
+from .prepare import remeasure_circumferences
+from .checkpoint_datablocks import PARTIAL_SUFFIX
+
+# Sculpt substeps only move the vertices of the uFit object (and repaint its color attributes).
+# Instead of saving a full .blend for every substep, the first substep of a step is saved as a base .blend file
+# (with its arrays in a "_base.npz" sidecar) and the following substeps as compressed .npz deltas.
+DELTA_OBJECT_NAME = 'uFit'
+
+# base arrays of the last used sidecar, so the sidecar is only read once per step
+base_arrays_cache = {}
+
+
+def get_base_arrays_path(blend_path):
+    return f'{os.path.splitext(blend_path)[0]}_base.npz'
+
+
+def get_mesh_fingerprint(mesh):
+    # topology fingerprint: the deltas can only be applied on a mesh with the same vertices and faces
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(np.array([len(mesh.vertices), len(mesh.edges), len(mesh.polygons)]).tobytes())
+    fingerprint.update(loops.tobytes())
+    fingerprint.update(loop_totals.tobytes())
+
+    return fingerprint.hexdigest()
+
+
+def set_object_mode(obj, mode):
+    # mode_set acts on the active object, override it with obj
+    override = {"object": obj, "active_object": obj}
+    bpy.ops.object.mode_set(override, mode=mode)
+
+
+def get_mesh_arrays(obj):
+    # in edit mode the color attributes point to the BMesh layers (without data), so read in object mode
+    edit_mode = obj.mode == 'EDIT'
+    if edit_mode:
+        set_object_mode(obj, 'OBJECT')
+
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+
+    colors = {}
+    for color_attr in mesh.color_attributes:
+        color = np.empty(len(color_attr.data) * 4, dtype=np.float32)
+        color_attr.data.foreach_get('color', color)
+        colors[color_attr.name] = (color_attr.domain, color_attr.data_type, color)
+
+    if edit_mode:
+        set_object_mode(obj, 'EDIT')
+
+    return get_mesh_fingerprint(mesh), co.reshape(-1, 3), colors
+
+
+def save_base_arrays(blend_path):
+    # save the vertex coordinates of the base file, the deltas of the next substeps are taken against them
+    obj = bpy.data.objects.get(DELTA_OBJECT_NAME)
+    if obj is None:
+        return
+
+    fingerprint, co, _ = get_mesh_arrays(obj)
+    base_path = get_base_arrays_path(blend_path)
+    np.savez(base_path, fingerprint=np.array(fingerprint), co=co)
+    base_arrays_cache.clear()
+    base_arrays_cache[base_path] = (fingerprint, co)
+
+
+def load_base_arrays(base_path):
+    if base_path not in base_arrays_cache:
+        base_arrays_cache.clear()
+        with np.load(base_path) as data:
+            base_arrays_cache[base_path] = (str(data['fingerprint']), data['co'])
+
+    return base_arrays_cache[base_path]
+
+
+def find_base(checkpoints_dir, workflow_folder, substep):
+    # the closest previous substep of the same step that was saved as a full .blend
+    for base_substep in range(substep - 1, -1, -1):
+        for ext in ['.blend', PARTIAL_SUFFIX]:
+            blend_path = f'{checkpoints_dir}/{workflow_folder}_{base_substep}{ext}'
+            if os.path.isfile(blend_path) and os.path.isfile(get_base_arrays_path(blend_path)):
+                return blend_path
+
+    return None
+
+
+def get_checkpoint_items(context):
+    return [{'step': cp.step, 'step_nr': cp.step_nr, 'sub_step_nr': cp.sub_step_nr,
+             'name': cp.name, 'file_path': cp.file_path}
+            for cp in context.scene.ufit_checkpoint_collection]
+
+
+def save_delta(context, checkpoints_dir, workflow_folder, substep):
+    """Saves the substep as a delta against its base, returns the delta file path or None if not possible"""
+    obj = bpy.data.objects.get(DELTA_OBJECT_NAME)
+    base_blend_path = find_base(checkpoints_dir, workflow_folder, substep)
+    if obj is None or base_blend_path is None:
+        return None
+
+    fingerprint, co, colors = get_mesh_arrays(obj)
+    base_fingerprint, base_co = load_base_arrays(get_base_arrays_path(base_blend_path))
+    if fingerprint != base_fingerprint:
+        return None  # topology changed, a full save is required
+
+    # only store the moved vertices
+    changed_ix = np.flatnonzero(np.any(co != base_co, axis=1)).astype(np.int32)
+
+    meta = {
+        'base': os.path.basename(base_blend_path),
+        'fingerprint': fingerprint,
+        'substep': substep,
+        'checkpoints': get_checkpoint_items(context),
+        'colors': [(name, domain, data_type) for name, (domain, data_type, _) in colors.items()],
+    }
+    arrays = {f'color_{i}': color for i, (_, _, color) in enumerate(colors.values())}
+
+    file_path = f'{checkpoints_dir}/{workflow_folder}_{substep}.npz'
+    np.savez_compressed(file_path, meta=np.array(json.dumps(meta)), changed_ix=changed_ix,
+                        changed_co=co[changed_ix], **arrays)
+
+    return file_path
+
+
+def set_mesh_arrays(obj, co, colors):
+    """Sets the vertex coordinates and color attributes (name -> (domain, data_type, color)) of the object"""
+    edit_mode = obj.mode == 'EDIT'
+    if edit_mode:
+        set_object_mode(obj, 'OBJECT')
+
+    mesh = obj.data
+    mesh.vertices.foreach_set('co', co.ravel())
+
+    for name, (domain, data_type, color) in colors.items():
+        # an empty array holds no colors (e.g. saved from edit mode), keep the current color attribute
+        if not len(color):
+            continue
+
+        color_attr = mesh.color_attributes.get(name)
+        if color_attr is not None and (color_attr.domain != domain or color_attr.data_type != data_type):
+            mesh.color_attributes.remove(color_attr)
+            color_attr = None
+        if color_attr is None:
+            color_attr = mesh.color_attributes.new(name=name, type=data_type, domain=domain)
+
+        if len(color_attr.data) * 4 != len(color):
+            raise Exception(f'The colors of {name} in the checkpoint do not match the mesh.')
+        color_attr.data.foreach_set('color', color)
+
+    mesh.update()
+
+    if edit_mode:
+        set_object_mode(obj, 'EDIT')
+
+
+def set_scene_state(context, substep, checkpoint_items):
+    context.scene.ufit_substep = substep
+    context.scene.ufit_checkpoint_collection.clear()
+    for item in checkpoint_items:
+        checkpoint_item = context.scene.ufit_checkpoint_collection.add()
+        for key, value in item.items():
+            setattr(checkpoint_item, key, value)
+
+    # the circumferences follow from the restored mesh
+    if any(circum > 0 for circum in context.scene.ufit_circumferences):
+        remeasure_circumferences(context)
+
+
+def apply_delta(context, file_path):
+    with np.load(file_path) as data:
+        meta = json.loads(str(data['meta']))
+        changed_ix = data['changed_ix']
+        changed_co = data['changed_co']
+        colors = {name: (domain, data_type, data[f'color_{i}'])
+                  for i, (name, domain, data_type) in enumerate(meta['colors'])}
+
+    obj = bpy.data.objects[DELTA_OBJECT_NAME]
+    fingerprint, co, _ = get_mesh_arrays(obj)
+    if fingerprint != meta['fingerprint']:
+        raise Exception('The checkpoint does not match its base file.')
+
+    co[changed_ix] = changed_co
+    set_mesh_arrays(obj, co, colors)
+    set_scene_state(context, meta['substep'], meta['checkpoints'])
+
+
+def get_delta_base(file_path):
+    with np.load(file_path) as data:
+        base = json.loads(str(data['meta']))['base']
+
+    return os.path.join(os.path.dirname(file_path), base)
@@ -0,0 +1,110 @@
+import os
+import json
+from datetime import datetime
+from ..utils import user_interface
+
+# append-only log of the checkpoint events in a checkpoints folder (one json object per line)
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def get_manifest_path(checkpoints_dir):
+    return os.path.join(checkpoints_dir, MANIFEST_NAME)
+
+
+def append_entries(checkpoints_dir, entries):
+    manifest_path = get_manifest_path(checkpoints_dir)
+
+    lines = ''
+    for entry in entries:
+        entry = dict(entry,
+                     timestamp=datetime.now().isoformat(timespec='seconds'),
+                     version=user_interface.get_addon_version('uFit'))
+        lines += json.dumps(entry) + '\n'
+
+    with open(manifest_path, 'ab+') as file:
+        # a crash can leave the last line unfinished, start the new entries on their own line
+        file.seek(0, os.SEEK_END)
+        if file.tell() > 0:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b'\n':
+                lines = '\n' + lines
+
+        file.write(lines.encode())
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def record_clear(checkpoints_dir):
+    append_entries(checkpoints_dir, [{'event': 'clear'}])
+
+
+def record_checkpoint(checkpoints_dir, step, substep, file_path):
+    append_entries(checkpoints_dir, [{
+        'event': 'add',
+        'step': step,
+        'substep': substep,
+        'file': os.path.basename(file_path),
+        'size': os.path.getsize(file_path) if os.path.isfile(file_path) else 0,
+    }])
+
+
+def record_removal(checkpoints_dir, event, step, substep, removed_files):
+    append_entries(checkpoints_dir, [{
+        'event': event,
+        'step': step,
+        'substep': substep,
+        'removed': [os.path.basename(f) for f in removed_files],
+    }])
+
+
+def read_manifest(checkpoints_dir):
+    manifest_path = get_manifest_path(checkpoints_dir)
+    if not os.path.isfile(manifest_path):
+        return None
+
+    entries = []
+    with open(manifest_path, 'r') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # line left unfinished by a crash while appending
+
+    return entries
+
+
+def get_created_version(entries):
+    # version of the add-on that created the checkpoints folder
+    for entry in reversed(entries):
+        if entry['event'] == 'clear':
+            return entry['version']
+
+    return entries[0]['version'] if entries else None
+
+
+def get_checkpoints(entries):
+    # replay the events to get the current checkpoints, in the order they were added
+    checkpoints = {}
+    for entry in entries:
+        if entry['event'] == 'clear':
+            checkpoints.clear()
+        elif entry['event'] == 'add':
+            checkpoints.pop(entry['file'], None)  # a re-added file moves to the end
+            checkpoints[entry['file']] = entry
+        elif 'removed' in entry:
+            for file_name in entry['removed']:
+                checkpoints.pop(file_name, None)
+
+    return list(checkpoints.values())
+
+
+def get_latest_checkpoint(checkpoints_dir, entries, step=None):
+    # latest checkpoint (of a specific step) of which the file still exists
+    for entry in reversed(get_checkpoints(entries)):
+        file_path = os.path.join(checkpoints_dir, entry['file'])
+        if (not step or entry['step'] == step) and os.path.isfile(file_path):
+            return file_path, entry['step']
+
+    return None, None
@@ -0,0 +1,141 @@
+import os
+import gzip
+import shutil
+import threading
+import bpy
+from . import checkpoint_manifest, checkpoint_deltas
+from .....config_ufit import logger
+
+# Retention policy for the checkpoints folder, configured in the add-on preferences:
+# - keep only the last N substeps of every step
+# - stay within a disk budget per patient by removing the oldest checkpoints
+# - gzip the older checkpoint files in a background thread (Blender reads gzipped .blend files)
+BLEND_MAGIC = b'BLENDER'
+
+
+def get_policy_prefs(context):
+    return context.preferences.addons['ufit'].preferences
+
+
+def schedule(context):
+    # run after the operator is finished, so the policy is not on the critical path
+    # (timers do not run in background mode, run directly there)
+    if bpy.app.background:
+        apply_policy()
+    else:
+        bpy.app.timers.register(apply_policy, first_interval=0.5)
+
+
+def sync_collection(context):
+    # remove the checkpoints of which the file no longer exists (e.g. after opening an older checkpoint)
+    collection = context.scene.ufit_checkpoint_collection
+    for i in reversed(range(len(collection))):
+        if not os.path.isfile(collection[i].file_path):
+            collection.remove(i)
+
+
+def get_required_bases(file_paths):
+    # delta checkpoints can only be restored with their base file
+    bases = set()
+    for file_path in file_paths:
+        if file_path.endswith('.npz') and os.path.isfile(file_path):
+            bases.add(checkpoint_deltas.get_delta_base(file_path))
+
+    return bases
+
+
+def get_file_size(file_path):
+    size = 0
+    if file_path.endswith('.blend'):
+        base_arrays_path = checkpoint_deltas.get_base_arrays_path(file_path)
+        size += os.path.getsize(base_arrays_path) if os.path.isfile(base_arrays_path) else 0
+
+    return size + (os.path.getsize(file_path) if os.path.isfile(file_path) else 0)
+
+
+def plan_removals(collection, keep_substeps, disk_budget):
+    items = [(cp.step, cp.sub_step_nr, cp.file_path) for cp in collection]
+    removals = set()
+
+    # keep the last N substeps per step
+    if keep_substeps > 0:
+        steps = {}
+        for step, sub_step_nr, file_path in items:
+            steps.setdefault(step, []).append((sub_step_nr, file_path))
+        for substeps in steps.values():
+            substeps.sort()
+            removals.update(file_path for _, file_path in substeps[:-keep_substeps])
+
+    # remove the oldest checkpoints until the budget is reached (always keep the latest checkpoint)
+    if disk_budget > 0:
+        kept = [file_path for _, _, file_path in items if file_path not in removals]
+        total_size = sum(get_file_size(f) for f in kept)
+        for file_path in kept[:-1]:
+            if total_size <= disk_budget * 1e6:
+                break
+            removals.add(file_path)
+            total_size -= get_file_size(file_path)
+
+    # never remove a base file of a kept delta
+    kept = [file_path for _, _, file_path in items if file_path not in removals]
+    return removals - get_required_bases(kept)
+
+
+def is_compressed(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read(len(BLEND_MAGIC)) != BLEND_MAGIC
+
+
+def compress_file(file_path):
+    # gzip into a temporary file and replace the original, so the checkpoint is never left half written
+    tmp_path = f'{file_path}.tmp'
+    try:
+        mtime = os.path.getmtime(file_path)
+        with open(file_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+
+        # the checkpoint was overwritten in the meantime, keep the new one
+        if os.path.getmtime(file_path) != mtime:
+            os.remove(tmp_path)
+            return
+
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        logger.warning(f"Could not compress the checkpoint {file_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def compress_files(file_paths):
+    for file_path in file_paths:
+        if os.path.isfile(file_path) and not is_compressed(file_path):
+            compress_file(file_path)
+
+
+def apply_policy():
+    # avoid circular imports
+    from .checkpoints import remove_checkpoint_file
+
+    context = bpy.context
+    prefs = get_policy_prefs(context)
+    scene = context.scene
+    collection = scene.ufit_checkpoint_collection
+    checkpoints_dir = scene.ufit_folder_checkpoints
+
+    # prune
+    removals = plan_removals(collection, prefs.keep_substeps, prefs.disk_budget)
+    if removals:
+        for f in removals:
+            remove_checkpoint_file(f)
+        for i in reversed(range(len(collection))):
+            if collection[i].file_path in removals:
+                collection.remove(i)
+        checkpoint_manifest.record_removal(checkpoints_dir, 'prune', None, None, sorted(removals))
+
+    # compress all but the latest checkpoint (the most likely to be opened again)
+    if prefs.compress_checkpoints:
+        file_paths = [cp.file_path for cp in collection][:-1]
+        file_paths = [f for f in file_paths if f.endswith('.blend')]
+        threading.Thread(target=compress_files, args=(file_paths,), daemon=True).start()
+
+    return None  # do not repeat the timer
@@ -1,7 +1,10 @@
 import os
-import re
+import functools
 import bpy
 from ..utils import general, user_interface
+from . import workflow_registry, checkpoint_manifest, checkpoint_deltas
+from . import checkpoint_datablocks, checkpoint_policy, snapshot_ring
+from .....config_ufit import logger
 
 
 #################################
@@ -23,22 +26,80 @@ def update_progress(context, step, workflow):
             context.scene.ufit_progress = (i - 2) / (len(workflow.keys()) - 3) * 100
 
 
+def get_step_transition(context):
+    ufit_prefs = context.preferences.addons['ufit'].preferences
+    return ufit_prefs.step_transition, ufit_prefs.save_on_step
+
+
+def get_checkpoint_format(context):
+    return context.preferences.addons['ufit'].preferences.checkpoint_format
+
+
+def save_checkpoint_file(context, file_stem, copy=False):
+    # save the checkpoint as a full main file or with only the workflow datablocks, returns the file path
+    ufit_prefs = context.preferences.addons['ufit'].preferences
+
+    # do not write .blend1 backup versions of checkpoints
+    save_version = context.preferences.filepaths.save_version
+    if ufit_prefs.skip_backup_versions:
+        context.preferences.filepaths.save_version = 0
+
+    try:
+        if get_checkpoint_format(context) == 'datablocks':
+            file_path = f'{file_stem}{checkpoint_datablocks.PARTIAL_SUFFIX}'
+            checkpoint_datablocks.write_checkpoint(context, file_path)
+        else:
+            file_path = f'{file_stem}.blend'
+            bpy.ops.wm.save_as_mainfile(filepath=file_path, copy=copy)
+    finally:
+        context.preferences.filepaths.save_version = save_version
+
+    return file_path
+
+
+def open_checkpoint(file_path):
+    if file_path.endswith('.npz'):
+        open_checkpoint(checkpoint_deltas.get_delta_base(file_path))
+        checkpoint_deltas.apply_delta(bpy.context, file_path)
+    elif checkpoint_datablocks.is_partial_checkpoint(file_path):
+        checkpoint_datablocks.restore_checkpoint(file_path)
+        user_interface.basic_init_ufit()
+    else:
+        bpy.ops.wm.open_mainfile(filepath=file_path)
+
+
+def save_step_file(file_path):
+    try:
+        bpy.ops.wm.save_as_mainfile(filepath=file_path, copy=True)
+    except Exception as e:
+        logger.warning(f"Could not save the step file {file_path}: {e}")
+
+
 def set_active_step(context, step, path_consts, ui_consts, exec_save=True):
     bpy.types.Scene.ufit_active_step = step
 
     if exec_save:
-        # workaround to undo the history after each step
         file_path = f'{context.scene.ufit_folder_checkpoints}/{context.scene.ufit_scan_filename}.blend'
+        step_transition, save_on_step = get_step_transition(context)
 
-        bpy.ops.wm.save_as_mainfile(filepath=file_path, copy=True)
-        bpy.ops.wm.open_mainfile(filepath=file_path)
+        if step_transition == 'reload':
+            # workaround to undo the history after each step
+            bpy.ops.wm.save_as_mainfile(filepath=file_path, copy=True)
+            bpy.ops.wm.open_mainfile(filepath=file_path)
+        elif save_on_step:
+            # save a copy without reloading, deferred so that the step change is not blocked by the save
+            # (timers do not run in background mode, save directly there)
+            if bpy.app.background:
+                save_step_file(file_path)
+            else:
+                bpy.app.timers.register(functools.partial(save_step_file, file_path), first_interval=0.1)
 
         general.set_ufit_logo()  # reset logo because textures are removed when opening new files
         set_assistance(step, path_consts, ui_consts)
 
         update_progress(context, step, ui_consts['workflow'])
 
-        # fill the history by pushing "null operation" undo steps
+        # limit the history by pushing "null operation" undo steps, so that the previous step cannot be undone
         # WORKAROUND: context is removed when opening a new main file
         bpy.app.timers.register(fill_history_with_null_operations, first_interval=0.1)
     else:
@@ -65,10 +126,10 @@ def set_assistance(step, path_consts, ui_consts):
 
 def set_modal_step(context, modal_func, name):
     # calculate paths
-    current_file_path = f'{context.scene.ufit_folder_checkpoints}/{context.scene.ufit_scan_filename}.blend'
+    current_file_stem = f'{context.scene.ufit_folder_checkpoints}/{context.scene.ufit_scan_filename}'
     modal_file_path = f'{context.scene.ufit_folder_checkpoints}/{name}.blend'
 
-    bpy.ops.wm.save_as_mainfile(filepath=current_file_path, copy=True)  # first save the current file/step
+    save_checkpoint_file(context, current_file_stem, copy=True)  # first save the current file/step
     bpy.ops.wm.save_as_mainfile(filepath=modal_file_path, copy=True)  # then save the modal file/step
     bpy.ops.wm.open_mainfile(filepath=modal_file_path)  # open the modal file
 
@@ -81,7 +142,9 @@ def set_modal_step(context, modal_func, name):
 
 def close_modal_step(context, path_consts, ui_consts):
     file_path = f'{context.scene.ufit_folder_checkpoints}/{context.scene.ufit_scan_filename}.blend'
-    bpy.ops.wm.open_mainfile(filepath=file_path)  # open the modal file
+    if get_checkpoint_format(context) == 'datablocks':
+        file_path = file_path.replace('.blend', checkpoint_datablocks.PARTIAL_SUFFIX)
+    open_checkpoint(file_path)  # open the file of the current step
 
     # reset step (assistance image)
     set_active_step(context, context.scene.ufit_active_step, path_consts, ui_consts)
@@ -153,6 +216,10 @@ def clear_checkpoints(context):
         for fname in os.listdir(context.scene.ufit_folder_checkpoints):
             os.remove(f'{context.scene.ufit_folder_checkpoints}/{fname}')
 
+    # start a new manifest
+    checkpoint_manifest.record_clear(context.scene.ufit_folder_checkpoints)
+    snapshot_ring.clear()
+
     # remove checkpoint list
     context.scene.ufit_checkpoint_collection.clear()
 
@@ -169,64 +236,83 @@ def get_checkpoint_files(context, step_nr, sub_step_nr=0):
 
 
 def get_workflow_step(step, path_consts):
-    # get list of steps from workflow
-    workflow_dir = os.path.join(os.path.dirname(__file__), f'../../../..{path_consts["paths"]["workflow_path"]}')
-    workflow_steps = os.listdir(workflow_dir)
-    sorted(workflow_steps)
+    # find the step folder in the workflow registry (no filesystem access)
+    workflow_step = workflow_registry.get_step(step, path_consts)
 
-    # find step and assign to checkpoint filename
-    workflow_step = None
-    for ws in workflow_steps:
-        if ws.startswith('ST_'):
-            ws_splitted = ws.split('_', 2)  # splits on the first and second underscore
-            if step == ws_splitted[2]:  # check if equal to the third split
-                workflow_step = ws
-                break
-
-    return workflow_step
+    return workflow_step.folder if workflow_step else None
 
 
 def get_workflow_step_nr(step, path_consts, raise_exception=True):
-    workflow_step = get_workflow_step(step, path_consts)
+    workflow_step = workflow_registry.get_step(step, path_consts)
 
     if workflow_step:
-        # Define the regular expression pattern to match the number
-        pattern = r'\d+'
-
-        # Use the re.search() function to find the first match of the pattern in the string
-        match = re.search(pattern, workflow_step)
-
-        # Extract the matched substring and convert it to an integer
-        return int(match.group())
+        return workflow_step.nr
     else:
         if raise_exception:
             raise Exception('Could not find a workflow step number.')
         return -1
 
 
-def add_checkpoint(context, step, path_consts, ui_consts, sub_steps):
-    workflow_step = get_workflow_step(step, path_consts)
-    step_nr = get_workflow_step_nr(step, path_consts)
+def remove_checkpoint_file(file_path):
+    # remove the checkpoint file together with its blend1 backup and delta base arrays
+    related_files = [file_path]
+    if file_path.endswith('.blend'):
+        related_files += [file_path.replace('.blend', '.blend1'), checkpoint_deltas.get_base_arrays_path(file_path)]
+
+    for f in related_files:
+        if os.path.isfile(f):
+            os.remove(f)
+
+
+def add_checkpoint(context, step, path_consts, ui_consts, sub_steps, deltas=False, apply_policy=True):
+    workflow_step = workflow_registry.get_step(step, path_consts)
 
     if workflow_step:
         workflow = ui_consts['workflow']
+        checkpoints_dir = context.scene.ufit_folder_checkpoints
+        substep = context.scene.ufit_substep
 
-        # save the file
-        file_name = f"{workflow_step}_{context.scene.ufit_substep}.blend"
-        file_path = f'{context.scene.ufit_folder_checkpoints}/{file_name}'
-        bpy.ops.wm.save_as_mainfile(filepath=file_path)
+        # remove an older checkpoint of this substep (e.g. after a rollback), it can be saved in another format
+        stale_files = [f'{checkpoints_dir}/{workflow_step.folder}_{substep}{ext}'
+                       for ext in ['.blend', checkpoint_datablocks.PARTIAL_SUFFIX, '.npz']]
+        stale_files = [f for f in stale_files if os.path.isfile(f)]
+        for f in stale_files:
+            remove_checkpoint_file(f)
+        if stale_files:
+            checkpoint_manifest.record_removal(checkpoints_dir, 'overwrite', step, substep, stale_files)
+
+        # save the substep as a delta against its base if possible, otherwise save the full file
+        file_path = None
+        if deltas and sub_steps:
+            file_path = checkpoint_deltas.save_delta(context, checkpoints_dir, workflow_step.folder, substep)
+
+        if not file_path:
+            file_path = save_checkpoint_file(context, f'{checkpoints_dir}/{workflow_step.folder}_{substep}')
+
+            if deltas and sub_steps:
+                checkpoint_deltas.save_base_arrays(file_path)  # the next substeps are saved against this file
+
+        checkpoint_manifest.record_checkpoint(checkpoints_dir, step, substep, file_path)
+
+        # keep the substeps in memory for instant rollback
+        if sub_steps:
+            snapshot_ring.take_snapshot(context, file_path, step)
 
         # add the checkpoint
         name = f'{workflow[step]["ui_name"]} {context.scene.ufit_substep}' if context.scene.ufit_substep != 0 else f'{workflow[step]["ui_name"]}'
         checkpoint_item = context.scene.ufit_checkpoint_collection.add()  # add an item to the property collection
         checkpoint_item.step = step
-        checkpoint_item.step_nr = step_nr
+        checkpoint_item.step_nr = workflow_step.nr
         checkpoint_item.sub_step_nr = context.scene.ufit_substep
         checkpoint_item.name = name  # set the property 'step' of the Checkpoint_PG item
         checkpoint_item.file_path = file_path
 
         if sub_steps:
             context.scene.ufit_substep += 1
+
+        # prune and compress the checkpoints according to the preferences
+        if apply_policy:
+            checkpoint_policy.schedule(context)
     else:
         raise Exception('Could not save the checkpoint.')
 
@@ -235,8 +321,28 @@ def rollback_to_checkpoint(context, path_consts, ui_consts):
     # determine rollback before adding checkpoint
     cp_rollback = str(context.scene.ufit_checkpoints)  # make a deepcopy
 
+    # restore a recent substep of the current step in place from memory
+    for cp in context.scene.ufit_checkpoint_collection:
+        if cp.name == cp_rollback and snapshot_ring.can_restore(context, cp.file_path, cp.step):
+            step = str(cp.step)
+            sub_step_nr = int(cp.sub_step_nr)
+            file_path = str(cp.file_path)
+
+            files_to_remove = get_checkpoint_files(context, get_workflow_step_nr(step, path_consts), sub_step_nr)
+            for f in files_to_remove:
+                remove_checkpoint_file(f)
+            checkpoint_manifest.record_removal(os.path.dirname(file_path), 'rollback', step, sub_step_nr,
+                                               files_to_remove)
+
+            snapshot_ring.restore_snapshot(context, file_path)
+            checkpoint_policy.sync_collection(context)
+            set_active_step(context, step, path_consts, ui_consts)
+            return
+
     # add the current step so that the file will be removed
-    add_checkpoint(context, context.scene.ufit_active_step, path_consts, ui_consts, context.scene.ufit_substep)
+    # (without the retention policy, it could prune the checkpoint to roll back to)
+    add_checkpoint(context, context.scene.ufit_active_step, path_consts, ui_consts, context.scene.ufit_substep,
+                   apply_policy=False)
 
     for cp in context.scene.ufit_checkpoint_collection:
         if cp.name == cp_rollback:
@@ -248,14 +354,16 @@ def rollback_to_checkpoint(context, path_consts, ui_consts):
             files_to_remove = get_checkpoint_files(context, step_nr, sub_step_nr)
 
             for f in files_to_remove:
-                if os.path.isfile(f):
-                    os.remove(f)
-                if os.path.isfile(f.replace('.blend', '.blend1')):  # also remove the blend1 file if it exists
-                    os.remove(f.replace('.blend', '.blend1'))
+                remove_checkpoint_file(f)
 
             checkpoints_dir = os.path.dirname(file_path)
             modeling_folder = os.path.dirname(checkpoints_dir)
+            checkpoint_manifest.record_removal(checkpoints_dir, 'rollback', step, sub_step_nr, files_to_remove)
 
-            bpy.ops.wm.open_mainfile(filepath=file_path)
+            open_checkpoint(file_path)
             recalc_ufit_paths(context, modeling_folder, checkpoints_dir)
+            checkpoint_policy.sync_collection(context)
             set_active_step(context, step, path_consts, ui_consts)
+
+            # the checkpoint is restored, the retention policy can run again
+            checkpoint_policy.schedule(context)
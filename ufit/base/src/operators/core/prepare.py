@@ -1,5 +1,7 @@
 import bpy
-from ..utils import annotations, general, user_interface, color_attributes
+import bmesh
+import numpy as np
+from ..utils import annotations, general, user_interface, color_attributes, slicing, dirty_regions, transforms
 
 
 #########################################
@@ -28,7 +30,8 @@ def move_scan(context):
 
     # move the scan to the center
     knee_vert = general.get_single_vert_co(context)
-    general.set_object_origin(knee_vert)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    general.set_object_origin(ufit_obj, knee_vert)
     general.move_object(ufit_obj, -knee_vert)
 
     # apply location
@@ -161,13 +164,8 @@ def lift_ufit_non_manifold_top(context):
     ufit_obj = bpy.data.objects['uFit']
     non_manifold_areas = general.create_non_manifold_vertex_groups(context, ufit_obj, max_verts=None)
 
-    # get the non-manifold area with the biggest amount of vertices (big gap at top of socket)
-    max_nma = None
-    max_verts = 0
-    for nma, verts in non_manifold_areas.items():
-        if len(verts) > max_verts:
-            max_verts = len(verts)
-            max_nma = nma
+    # get the non-manifold area with the biggest amount of vertices (big gap at top of socket), they are ordered by size
+    max_nma = next(iter(non_manifold_areas), None)
 
     if max_nma:
         # highlight vertices from non-manifold area (vertex group)
@@ -243,11 +241,17 @@ def prep_circumferences(context):
     pass
 
 
-def add_circumference(context, i, z=0.0):
+def get_measure_obj():
     measure_obj = bpy.data.objects['uFit']
     if 'uFit_Measure' in bpy.data.objects:
         measure_obj = bpy.data.objects['uFit_Measure']
 
+    return measure_obj
+
+
+def add_circumference(context, i, z=0.0):
+    measure_obj = get_measure_obj()
+
     bpy.ops.object.mode_set(mode='OBJECT')
     bpy.ops.mesh.primitive_circle_add(radius=0.2, enter_editmode=False, align='WORLD', location=(0, 0, z),
                                       scale=(1, 1, 1))
@@ -264,53 +268,47 @@ def add_circumference(context, i, z=0.0):
     circum_obj.lock_location[0] = True
     circum_obj.lock_location[1] = True
 
-    # add a boolean modifier to find the intersection with the ufit object
+    # add a boolean modifier to preview the intersection with the ufit object while moving
     general.activate_object(context, circum_obj, mode='OBJECT')
     boolean_mod = circum_obj.modifiers.new(name="Boolean", type="BOOLEAN")
     boolean_mod.operation = 'INTERSECT'
     boolean_mod.solver = 'FAST'
     boolean_mod.object = measure_obj
 
-    # Set the origin to the median point of the object
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS')
+    # Set the origin to the center of mass of the object
+    transforms.set_origin_to_center_of_mass(circum_obj)
 
     # set the move tool
     bpy.ops.wm.tool_set_by_id(name="builtin.move")
 
 
-# you cannot immediately apply after adding circumference because the user first moves it to the correct position
-def apply_circumference(context):
-    z_coord = None
-    circumference = None
-
-    # ONLY APPLIES ONE AT THE TIME (for-loop breaks!)
-    for obj in bpy.data.objects:
-        if "Circum_" in obj.name and obj.modifiers:
-            # bug in blender - you have to use an override to apply the modifier
-            override = {"object": obj, "active_object": obj}
-            bpy.ops.object.modifier_apply(override, modifier="Boolean")
-
-            # get the z coord
-            z_coord = obj.location.z
-
-            # get the circumference
-            general.activate_object(context, obj, mode='EDIT')
-            circumference = general.get_mesh_circumference(obj)
-            general.activate_object(context, obj, mode='OBJECT')
+def create_circumference_obj(context, i, segments):
+    # merge the intersection segments into a closed outline
+    verts, edges = slicing.weld_segments(segments)
 
-            # move the origin of the object back to the median point (origin is dislocated after boolean operator)
-            # completely changes the location of the object. Perform this after storing the z-ix
-            bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
+    # scale so that the object is visible
+    if len(verts):
+        center = verts.mean(axis=0)
+        verts[:, :2] = center[:2] + 1.01 * (verts[:, :2] - center[:2])
 
-            # scale so that the object is visible
-            obj.scale = (1.01, 1.01, 1.0)
+    mesh = bpy.data.meshes.new(name=f"Circum_{i}")
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set('co', np.asarray(verts, dtype=np.float32).ravel())
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set('vertices', np.asarray(edges, dtype=np.int32).ravel())
+    mesh.update()
 
-            # apply transformations (resets origin of object to center of world!)
-            general.apply_transform(obj, use_location=True, use_rotation=True, use_scale=True)
+    # fill the outline with faces
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bmesh.ops.triangle_fill(bm, use_beauty=True, use_dissolve=True, edges=bm.edges[:])
+    bm.to_mesh(mesh)
+    bm.free()
 
-            break
+    circum_obj = bpy.data.objects.new(name=f"Circum_{i}", object_data=mesh)
+    context.collection.objects.link(circum_obj)
 
-    return z_coord, circumference
+    return circum_obj
 
 
 def hide_circumferences(context):
@@ -319,32 +317,32 @@ def hide_circumferences(context):
             obj.hide_set(True)
 
 
-def calc_circumferences(context, z_coord, circumference, distance=0.02):
-    i = 0
-    new_z_coord = z_coord
-    new_circum = circumference
-    while new_circum > 0.025:
-        context.scene.ufit_circum_z_ixs[i] = new_z_coord
-        context.scene.ufit_circumferences[i] = new_circum
-        i += 1
+def calc_circumferences(context, z_coord, distance=0.02):
+    # measure all circumferences downwards in one pass
+    max_num_circums = len(context.scene.ufit_circum_z_ixs)
+    z_coords = [z_coord - i * distance for i in range(max_num_circums)]
+    circumferences, polylines = slicing.measure_circumferences(get_measure_obj(), z_coords)
 
-        new_z_coord -= distance
-        add_circumference(context, i, new_z_coord)
-        new_z_coord, new_circum = apply_circumference(context)
+    for i, (z, circum) in enumerate(zip(z_coords, circumferences)):
+        if not circum > 0.025:  # stop when the circumference becomes too small
+            break
 
-    general.delete_obj_by_name_contains(f'Circum_{i}')  # delete the last added circum because it is too small
+        context.scene.ufit_circum_z_ixs[i] = z
+        context.scene.ufit_circumferences[i] = circum
+        create_circumference_obj(context, i, polylines[i])
 
     # hide the circumferences
     hide_circumferences(context)
 
 
 def add_other_circumferences(context):
-    # apply the first circumference
-    z_coord, circumference = apply_circumference(context)
+    # get the height of the first circumference and remove the (preview) object
+    z_coord = bpy.data.objects['Circum_0'].location.z
+    general.delete_obj_by_name_contains('Circum_')
 
-    # calculate the other circumferences
+    # calculate all the circumferences
     dist = float(context.scene.ufit_circums_distance)
-    calc_circumferences(context, z_coord, circumference, distance=dist)
+    calc_circumferences(context, z_coord, distance=dist)
 
     # set the initial circumferences
     context.scene.ufit_init_circumferences = context.scene.ufit_circumferences
@@ -354,13 +352,32 @@ def add_other_circumferences(context):
 
 
 # function called in other steps to remeasure circumferences when ufit object changed
-def remeasure_circumferences(context):
-    general.delete_obj_by_name_contains('Circum_')  # remove circum objects
-    for i, z in enumerate(context.scene.ufit_circum_z_ixs):
-        if context.scene.ufit_circumferences[i] > 0:  # only recalculate if it was calculated before
-            add_circumference(context, i, z)  # remeasure circumferences
-            new_z_coord, new_circum = apply_circumference(context)
-            context.scene.ufit_circumferences[i] = new_circum
+def delete_circumference_obj(i):
+    # exact name match, Circum_1 should not remove Circum_10
+    if f'Circum_{i}' in bpy.data.objects:
+        bpy.data.objects.remove(bpy.data.objects[f'Circum_{i}'], do_unlink=True)
+
+
+def remeasure_circumferences(context, only_dirty=False):
+    measure_obj = get_measure_obj()
+
+    # only recalculate if it was calculated before (and lies within the modified z-band if requested)
+    circum_ixs = [i for i, circum in enumerate(context.scene.ufit_circumferences) if circum > 0]
+    if only_dirty:
+        circum_ixs = [i for i in circum_ixs
+                      if dirty_regions.is_z_dirty(measure_obj.name, context.scene.ufit_circum_z_ixs[i])]
+    dirty_regions.clear_dirty_z_band(measure_obj.name)
+
+    if not circum_ixs:
+        return
+
+    z_coords = [context.scene.ufit_circum_z_ixs[i] for i in circum_ixs]
+    circumferences, polylines = slicing.measure_circumferences(measure_obj, z_coords)
+
+    for i, circum, segments in zip(circum_ixs, circumferences, polylines):
+        context.scene.ufit_circumferences[i] = circum
+        delete_circumference_obj(i)
+        create_circumference_obj(context, i, segments)
 
     # hide the circumferences
     hide_circumferences(context)
@@ -3,9 +3,14 @@ import bmesh
 import math
 from mathutils import Vector
 import numpy as np
-from ..utils import annotations, color_attributes, general, user_interface, nodes
+from ..utils import annotations, color_attributes, general, user_interface, nodes, dirty_regions, selection, \
+    point_ordering, transforms, vertex_groups, sculpt_kernel
 
 color_attr_select = 'area_selection'
+# integer attribute tagging the vertices of the cutout plane, to reselect them after joining with the uFit object
+CUTOUT_TAG = 'ufit_cutout_tag'
+# remove crossings of the (closed) cutout path drawn with the annotations
+CUTOUT_PATH_TWO_OPT = True
 
 
 #################################
@@ -51,6 +56,7 @@ def minimal_prep_free_sculpt(context):
     general.activate_object(context, ufit_obj, mode='SCULPT')
 
 
+@dirty_regions.tracks_z_changes('uFit')
 def smooth_region(context):
     ufit_obj = bpy.data.objects['uFit']
 
@@ -65,34 +71,28 @@ def smooth_region(context):
     bpy.ops.object.editmode_toggle()
 
 
+@dirty_regions.tracks_z_changes('uFit')
 def push_pull_region(context, extrusion, exclude_vertex_groups=None):
     # set the ufit object
     ufit_obj = bpy.data.objects['uFit']
 
-    # select vertices by color attribute layer - exclude default color black
-    color_attributes.select_vertices_by_color_exclude(context, ufit_obj, color_attr_select, Vector((1, 1, 1, 1)))
-
-    # decrease selected region
-    # general.decrease_selected_vertices_region(ufit_obj, 2)
-
-    # deselect vertices that should be excluded
-    if exclude_vertex_groups:
-        general.deselect_vertices_from_vertex_groups(context, ufit_obj, exclude_vertex_groups)
-
-    # move vertices along there normals
-    general.move_verts_along_faces_normal(ufit_obj, extrusion)
+    # the painted intensity (difference with the default color white) is the weight of the extrusion
+    weights = color_attributes.get_color_weights(ufit_obj, color_attr_select, base_color=(1, 1, 1, 1))
 
-    # increase the selected region for smoothing
-    general.increase_selected_vertices_region(ufit_obj, 2)
+    # faint paint within the color tolerance (e.g. brush spill) is not part of the region, as before
+    weights[~color_attributes.get_color_exclude_mask(ufit_obj, color_attr_select, Vector((1, 1, 1, 1)))] = 0
 
-    # deselect vertices again that should be excluded
+    # vertices that should be excluded stay pinned
+    pinned_mask = None
     if exclude_vertex_groups:
-        general.deselect_vertices_from_vertex_groups(context, ufit_obj, exclude_vertex_groups)
+        vg_names = [vg_name for vg_name in exclude_vertex_groups if vg_name in ufit_obj.vertex_groups]
+        pinned_mask = vertex_groups.get_group_mask(ufit_obj, vg_names)
 
-    # smooth the smooth_vertices and deselect
-    bpy.ops.mesh.vertices_smooth(factor=0.5, repeat=7)
+    # move the vertices along their normals and feather the boundary of the region
+    sculpt_kernel.push_pull(ufit_obj, extrusion, weights, pinned_mask=pinned_mask)
 
 
+@dirty_regions.tracks_z_changes('uFit')
 def push_pull_region_circular(context, extrusion):
     ufit_obj = bpy.data.objects['uFit']
 
@@ -184,6 +184,7 @@ def minimal_prep_pull_bottom(context):
     general.activate_object(context, ufit_obj, mode='EDIT')
 
 
+@dirty_regions.tracks_z_changes('uFit')
 def pull_bottom(context, extrusion):
     # set the ufit object
     ufit_obj = bpy.data.objects['uFit']
@@ -222,15 +223,15 @@ def add_straight_cutout_plane(context):
     ufit_obj = bpy.data.objects['uFit']
 
     # set the local object origin already to the center of mass
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
+    transforms.set_origin_to_center_of_mass(ufit_obj)
 
     # add straight cutout plane
     bpy.ops.mesh.primitive_plane_add(size=0.35, location=ufit_obj.location)
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS', center='MEDIAN')
 
     # rename plane
     cut_obj = context.active_object
     cut_obj.name = "uFit_Cutout"
+    transforms.set_origin_to_center_of_mass(cut_obj)
 
     # apply location
     general.apply_transform(ufit_obj, use_location=True, use_rotation=True, use_scale=True)
@@ -295,10 +296,9 @@ def create_cutout_path(context):
 
     # selected_verts = general.get_selected_vertices_co(context)
     all_points = annotations.get_all_points(anno_name='Selections', layer_name='Cutout')
-    ordered_verts = general.order_verts_by_closest(all_points)
-    filtered_verts = general.filter_close_vertex_array(ordered_verts, rtol=0.005, atol=0.005)
+    ordered_verts = point_ordering.order_points(all_points, rtol=0.005, atol=0.005, use_two_opt=CUTOUT_PATH_TWO_OPT)
 
-    points_for_path = [(v.x, v.y, v.z, 1) for v in filtered_verts]
+    points_for_path = [(x, y, z, 1) for x, y, z in ordered_verts.tolist()]
 
     general.creat_path_by_points(polyline, points_for_path)
 
@@ -383,10 +383,8 @@ def create_cutout_line(context):
     # apply scaling, rotation and location
     bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
 
-    # Store vertex coordinates of UFitCutout object
-    vert_coordinates = []
-    for v in ufit_cutout_obj.data.vertices:
-        vert_coordinates.append(v.co)
+    # tag the vertices of the UFitCutout object, so they can be reselected after joining
+    selection.tag_vertices(ufit_cutout_obj, CUTOUT_TAG)
 
     # make the ufit object the active object
     general.activate_object(context, ufit_obj, mode='OBJECT')
@@ -408,8 +406,9 @@ def create_cutout_line(context):
     # make the new ufit object active and switch to edit mode
     general.activate_object(context, ufit_obj, mode='EDIT')
 
-    # Use vertex coordinates to reselect joined UFitCutout object
-    general.select_verts_by_co(ufit_obj, vert_coordinates)
+    # Use the tag to reselect joined UFitCutout object
+    bpy.ops.mesh.select_mode(type='VERT')
+    selection.set_vertex_select_mask(ufit_obj, selection.get_tag_mask(ufit_obj, CUTOUT_TAG))
 
     # switch to face selection
     bpy.ops.mesh.select_mode(type='FACE')
@@ -419,15 +418,16 @@ def create_cutout_line(context):
                            separate_mode='CUT',
                            solver='EXACT')
 
-    # Use vertex coordinates again to reselect joined UFitCutout object, and delete verts
+    # Use the tag again to reselect joined UFitCutout object, and delete verts
     bpy.ops.mesh.select_mode(type='VERT')
-    general.select_verts_by_co(ufit_obj, vert_coordinates)
+    selection.set_vertex_select_mask(ufit_obj, selection.get_tag_mask(ufit_obj, CUTOUT_TAG))
     bpy.ops.mesh.select_linked(delimit=set())  # new vertices created due to intersect should also be deleted
-    selected_verts = general.get_selected_vertices_co(context)
+    selected_verts = selection.get_selected_vertices_co(ufit_obj)
     bpy.ops.mesh.delete(type='VERT')
+    selection.remove_tag(ufit_obj, CUTOUT_TAG)
 
-    # select the cutout line
-    general.select_verts_by_co(ufit_obj, selected_verts)
+    # select the cutout line (the vertices of the socket at the same position as the deleted intersect vertices)
+    selection.select_vertices_by_co(ufit_obj, selected_verts)
 
 
 def get_avg_z(obj):
@@ -608,6 +608,8 @@ def mm_scaling(context, obj, mm_dist):
     general.scale_distance(obj, mm_dist)
 
 
+@dirty_regions.tracks_z_changes('uFit')
+@dirty_regions.tracks_z_changes('uFit_Measure')
 def scale(context):
     ufit_obj = bpy.data.objects['uFit']
 
@@ -690,14 +692,11 @@ def prep_draw(context):
 
     # get border vertices (using vertex groups from previous cutout)
     vgs = general.get_all_cutout_edges(context)
-    edge_vertices = general.get_vertices_from_multiple_vertex_groups(ufit_obj, vgs)
+    edge_vertices_ix = general.get_vertices_ix_from_multiple_vertex_groups(ufit_obj, vgs)
 
-    # add a safety margin to the border by including more vertices
-    border_vertices = general.expand_border_vertices(
-        ufit_obj, edge_vertices, MARGIN_DISTANCE_BORDER
-    )
-    extended_edge_vertices = general.expand_border_vertices(
-        ufit_obj, edge_vertices, MARGIN_DISTANCE_EDGE
+    # add a safety margin to the border by including more vertices (both margins in one pass)
+    border_vertices, extended_edge_vertices = general.expand_border_vertices(
+        ufit_obj, edge_vertices_ix, (MARGIN_DISTANCE_BORDER, MARGIN_DISTANCE_EDGE)
     )
 
     # color border vertices red
@@ -879,10 +878,16 @@ def prep_custom_thickness(context):
     bpy.data.brushes["Draw"].color = (0, 1, 0)  # green
     bpy.data.brushes["Draw"].secondary_color = (1, 1, 1)  # white
 
+    # index the vertex groups once for the step, every click reuses it to pin the cutout edges
+    vertex_groups.get_memberships(ufit_obj)
+
 
 def minimal_prep_custom_thickness(context):
     minimal_prep_push_pull_smooth(context)
 
+    # index the vertex groups once for the step, every click reuses it to pin the cutout edges
+    vertex_groups.get_memberships(bpy.data.objects['uFit'])
+
 
 def create_custom_thickness(context, extrusion):
     vgs = general.get_all_cutout_edges(context)
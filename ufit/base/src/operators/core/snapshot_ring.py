@@ -0,0 +1,105 @@
+from collections import OrderedDict
+import bpy
+from . import checkpoint_deltas
+from ..utils import vertex_groups
+
+# Bounded in-memory ring of the recent mesh states of the uFit object, one per checkpoint file.
+# Rolling back to one of these checkpoints within the same step restores the mesh in place,
+# without opening the checkpoint file. Older states and other steps fall back to the disk checkpoint.
+SNAPSHOT_OBJECT_NAME = 'uFit'
+
+# checkpoint file path -> snapshot, oldest first
+snapshots = OrderedDict()
+
+
+def get_budget(context):
+    return context.preferences.addons['ufit'].preferences.snapshot_budget * 1e6
+
+
+def clear():
+    snapshots.clear()
+
+
+def get_vertex_groups(obj):
+    # vertex group weights as (names, vertex indices, group indices, weights)
+    return vertex_groups.get_memberships(obj)
+
+
+def set_vertex_groups(obj, memberships):
+    obj.vertex_groups.clear()
+    vertex_groups.set_memberships(obj, *memberships)
+
+
+def get_snapshot_size(snapshot, counted):
+    arrays = [snapshot['co']] + [color for _, _, color in snapshot['colors'].values()]
+    if id(snapshot['vertex_groups']) not in counted:  # vertex groups can be shared between snapshots
+        counted.add(id(snapshot['vertex_groups']))
+        arrays += list(snapshot['vertex_groups'][1:])
+
+    return sum(a.nbytes for a in arrays)
+
+
+def enforce_budget(budget):
+    while snapshots:
+        counted = set()
+        if sum(get_snapshot_size(s, counted) for s in snapshots.values()) <= budget:
+            break
+        snapshots.popitem(last=False)
+
+
+def take_snapshot(context, file_path, step):
+    budget = get_budget(context)
+    obj = bpy.data.objects.get(SNAPSHOT_OBJECT_NAME)
+    if budget <= 0 or obj is None:
+        return
+
+    fingerprint, co, colors = checkpoint_deltas.get_mesh_arrays(obj)
+
+    # the substeps of a step do not change the vertex groups, share them with the previous snapshot
+    last = next(reversed(snapshots.values()), None)
+    if last and last['step'] == step and last['fingerprint'] == fingerprint \
+            and last['vertex_groups'][0] == [vg.name for vg in obj.vertex_groups]:
+        vertex_groups = last['vertex_groups']
+    else:
+        vertex_groups = get_vertex_groups(obj)
+
+    snapshots.pop(file_path, None)
+    snapshots[file_path] = {
+        'step': step,
+        'fingerprint': fingerprint,
+        'co': co,
+        'colors': colors,
+        'vertex_groups': vertex_groups,
+        'substep': context.scene.ufit_substep,
+        'checkpoints': checkpoint_deltas.get_checkpoint_items(context),
+    }
+
+    enforce_budget(budget)
+
+
+def can_restore(context, file_path, step):
+    snapshot = snapshots.get(file_path)
+    obj = bpy.data.objects.get(SNAPSHOT_OBJECT_NAME)
+    if snapshot is None or obj is None or snapshot['step'] != context.scene.ufit_active_step:
+        return False
+
+    return snapshot['step'] == step and checkpoint_deltas.get_mesh_fingerprint(obj.data) == snapshot['fingerprint']
+
+
+def restore_snapshot(context, file_path):
+    snapshot = snapshots[file_path]
+    newest = next(reversed(snapshots.values()))
+    obj = bpy.data.objects[SNAPSHOT_OBJECT_NAME]
+
+    # the newer snapshots are rolled back as well
+    file_paths = list(snapshots.keys())
+    for f in file_paths[file_paths.index(file_path) + 1:]:
+        del snapshots[f]
+
+    # vertex groups shared with the newest snapshot did not change within the step
+    if snapshot['vertex_groups'] is not newest['vertex_groups'] \
+            or [vg.name for vg in obj.vertex_groups] != snapshot['vertex_groups'][0]:
+        set_vertex_groups(obj, snapshot['vertex_groups'])
+
+    checkpoint_deltas.set_mesh_arrays(obj, snapshot['co'], snapshot['colors'])
+    checkpoint_deltas.set_scene_state(context, snapshot['substep'], snapshot['checkpoints'])
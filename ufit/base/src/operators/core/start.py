@@ -8,7 +8,9 @@ from .checkpoints import (
     set_active_step,
     clear_checkpoints,
     get_workflow_step,
+    open_checkpoint,
 )
+from . import checkpoint_manifest, checkpoint_policy
 from ..utils import general, nodes, user_interface
 
 
@@ -24,22 +26,51 @@ def start_modeling(context):
     context.scene.ufit_full_screen = True
 
 
-def start_from_existing(context, file_path_obj, path_consts, ui_consts, debug_step=None):
-    modeling_folder = os.path.dirname(file_path_obj)
-    checkpoints_dir = os.path.join(modeling_folder, "checkpoints")
+def get_settings_version(checkpoints_dir):
     file_path = os.path.join(checkpoints_dir, 'uFit_settings.txt')
-    add_on_version = user_interface.get_addon_version('uFit')
 
     if os.path.exists(file_path):
         with open(file_path, 'r') as file:
             lines = file.readlines()
             for line in lines:
                 if "uFit Version" in line:
-                    ufit_version = line.split(":")[1].strip()
-                    break
+                    return line.split(":")[1].strip()
     else:
         raise Exception(f"The uFit_settings.txt file does not exist")
 
+
+def find_latest_checkpoint(checkpoints_dir, path_consts, ui_consts, debug_step=None):
+    # fallback for checkpoint folders without manifest: match the workflow steps against the file names
+    checkpoints_files = os.listdir(checkpoints_dir)
+    checkpoints_files.reverse()
+
+    workflow = list(ui_consts['workflow'].keys())
+    workflow.reverse()
+    for step in workflow:
+        wf_step = get_workflow_step(step, path_consts)
+        for file in checkpoints_files:
+            if file.startswith('ST_'):
+                if wf_step \
+                        and wf_step in file \
+                        and file.endswith('.blend') \
+                        and (not debug_step or step == debug_step):
+                    return os.path.join(checkpoints_dir, file), step
+
+    return None, None
+
+
+def start_from_existing(context, file_path_obj, path_consts, ui_consts, debug_step=None):
+    modeling_folder = os.path.dirname(file_path_obj)
+    checkpoints_dir = os.path.join(modeling_folder, "checkpoints")
+    add_on_version = user_interface.get_addon_version('uFit')
+
+    # the manifest gives the version and latest checkpoint in a single read
+    manifest_entries = checkpoint_manifest.read_manifest(checkpoints_dir) if os.path.isdir(checkpoints_dir) else None
+    if manifest_entries:
+        ufit_version = checkpoint_manifest.get_created_version(manifest_entries)
+    else:
+        ufit_version = get_settings_version(checkpoints_dir)
+
     if add_on_version.split('.')[0].strip() != ufit_version.split('.')[0].strip():
         raise Exception(f"The 3D model was created with uFit version {ufit_version} "
                         f"and that is not compatible with uFit version {add_on_version}."
@@ -49,32 +80,19 @@ def start_from_existing(context, file_path_obj, path_consts, ui_consts, debug_st
         if context.scene.ufit_device_type not in modeling_folder:
             raise Exception(f"The chosen device type does not match the folder name")
 
-        checkpoints_files = os.listdir(checkpoints_dir)
-        checkpoints_files.reverse()
-        latest_checkpoint = None
-        active_step = None
-
-        workflow = list(ui_consts['workflow'].keys())
-        workflow.reverse()
-        for step in workflow:
-            for file in checkpoints_files:
-                if file.startswith('ST_'):
-                    wf_step = get_workflow_step(step, path_consts)
-                    if wf_step \
-                            and wf_step in file \
-                            and 'blend1' not in file \
-                            and (not debug_step or step == debug_step):
-                        latest_checkpoint = os.path.join(checkpoints_dir, file)
-                        active_step = step
-                        break
-
-            # also break out of big for loop
-            if latest_checkpoint and active_step:
-                break
+        latest_checkpoint, active_step = None, None
+        if manifest_entries:
+            latest_checkpoint, active_step = checkpoint_manifest.get_latest_checkpoint(checkpoints_dir,
+                                                                                       manifest_entries,
+                                                                                       step=debug_step)
+        if not latest_checkpoint:
+            latest_checkpoint, active_step = find_latest_checkpoint(checkpoints_dir, path_consts, ui_consts,
+                                                                    debug_step=debug_step)
 
         if latest_checkpoint:
-            bpy.ops.wm.open_mainfile(filepath=latest_checkpoint)
+            open_checkpoint(latest_checkpoint)
             recalc_ufit_paths(context, modeling_folder, checkpoints_dir)
+            checkpoint_policy.sync_collection(context)
             set_active_step(context, active_step, path_consts, ui_consts)
 
             return None
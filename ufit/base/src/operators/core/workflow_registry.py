@@ -0,0 +1,54 @@
+import os
+from types import MappingProxyType
+from collections import namedtuple
+
+# a workflow step folder, e.g. ST_60_circumferences -> WorkflowStep('circumferences', 'ST_60_circumferences', 60, 5)
+WorkflowStep = namedtuple('WorkflowStep', ['name', 'folder', 'nr', 'order'])
+
+# registry of the workflow steps per workflow path (one per device)
+registries = {}
+
+
+def get_workflow_dir(path_consts):
+    return os.path.join(os.path.dirname(__file__), f'../../../..{path_consts["paths"]["workflow_path"]}')
+
+
+def build_registry(path_consts):
+    # collect the step folders from the workflow directory
+    steps = []
+    for ws in os.listdir(get_workflow_dir(path_consts)):
+        if ws.startswith('ST_'):
+            ws_splitted = ws.split('_', 2)  # splits on the first and second underscore
+            steps.append((int(ws_splitted[1]), ws_splitted[2], ws))
+
+    # order the steps by their number
+    steps.sort()
+    registry = {}
+    for order, (nr, name, folder) in enumerate(steps):
+        if name not in registry:  # keep the first folder in case of duplicate step names
+            registry[name] = WorkflowStep(name, folder, nr, order)
+
+    return MappingProxyType(registry)
+
+
+def register_device(path_consts):
+    workflow_path = path_consts['paths']['workflow_path']
+    registries[workflow_path] = build_registry(path_consts)
+
+
+def unregister_device(path_consts):
+    registries.pop(path_consts['paths']['workflow_path'], None)
+
+
+def get_registry(path_consts):
+    workflow_path = path_consts['paths']['workflow_path']
+
+    # build the registry when the device was not registered (e.g. running outside the add-on registration)
+    if workflow_path not in registries:
+        register_device(path_consts)
+
+    return registries[workflow_path]
+
+
+def get_step(step, path_consts):
+    return get_registry(path_consts).get(step)
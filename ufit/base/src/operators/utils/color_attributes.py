@@ -1,7 +1,29 @@
 import bpy
 import numpy as np
 from mathutils import Vector
-from . import general
+from . import general, selection, slicing, spatial_index, texture_sampling
+
+# methods to interpolate the colors of the source vertices on the target vertices
+COLOR_TRANSFER_METHODS = ('barycentric', 'idw')
+
+
+def get_colors(color_attr):
+    # all colors of the color attribute as a (n, 4) array
+    colors = np.empty(len(color_attr.data) * 4, dtype=np.float32)
+    color_attr.data.foreach_get('color', colors)
+
+    return colors.reshape(-1, 4)
+
+
+def set_colors(color_attr, colors):
+    color_attr.data.foreach_set('color', np.asarray(colors, dtype=np.float32).ravel())
+
+    # foreach_set does not trigger the update of the mesh (e.g. the viewport in vertex paint mode)
+    color_attr.id_data.update()
+
+
+def fill_color_attribute(color_attr, color):
+    set_colors(color_attr, np.tile(np.array(color, dtype=np.float32), len(color_attr.data)))
 
 
 def add_new_color_attr(obj, name, color):
@@ -13,9 +35,7 @@ def add_new_color_attr(obj, name, color):
         domain='POINT',
     )
 
-    area_selection = obj.data.color_attributes[name].data  # this is all white
-    for vert in area_selection:
-        vert.color = color  # make it color
+    fill_color_attribute(obj.data.color_attributes[name], color)  # make it color
 
 
 def delete_color_attribute(obj, name):
@@ -32,9 +52,7 @@ def activate_color_attribute(obj, name):
 
 
 def reset_color_attribute(obj, name, color):
-    area_selection = obj.data.color_attributes[name].data
-    for vert in area_selection:
-        vert.color = color  # make it color
+    fill_color_attribute(obj.data.color_attributes[name], color)  # make it color
 
 
 def change_alpha_rgb(color_vec, alpha, keep_color=False):
@@ -50,67 +68,115 @@ def change_alpha_rgb(color_vec, alpha, keep_color=False):
     return Vector((r, g, b, brightness))
 
 
-def transfer_color_attr_source_target(source_obj, target_obj, source_color_attr_name, target_color_attr_name):
-    # find the closest n vertices on the source_obj
-    map_target_source = general.find_closest_n_vertices_kdtree(target_obj, source_obj, n=4)
+def change_alpha_rgb_colors(colors, alpha, keep_color=False):
+    # change_alpha_rgb for a (n, 4) array of colors
+    colors = np.array(colors, dtype=np.float32)
+    if keep_color:
+        colors[:, :3] *= 2 - alpha
+    colors[:, 3] *= alpha
 
-    target_obj_color = target_obj.data.color_attributes[source_color_attr_name].data  # this is all white
-    source_obj_color = source_obj.data.color_attributes[target_color_attr_name].data
-    for i, target_obj_vert in enumerate(map_target_source.keys()):
-        source_obj_verts = map_target_source[target_obj_vert]
+    return colors
 
-        # Calculate the average color
-        colors = [Vector(source_obj_color[v].color) for v in source_obj_verts]
-        avg_color = sum(colors, Vector((0.0, 0.0, 0.0, 0.0))) / len(colors)
 
-        # change alpha but keep the same color
-        avg_color = change_alpha_rgb(avg_color, alpha=0.9, keep_color=True)
-        target_obj_color[target_obj_vert].color = avg_color
+def get_barycentric_weights(points, a, b, c):
+    """Barycentric weights of the points in the triangles (a, b, c), all given as (n, 3) arrays.
+    The points are (close to) on the triangles, the weights are clipped and renormalized for the rounding errors."""
+    v0, v1, v2 = b - a, c - a, points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denom = d00 * d11 - d01 * d01
 
+    # degenerate triangles get equal weights
+    weights = np.full((len(points), 3), 1 / 3)
+    valid = np.abs(denom) > 1e-12
+    v = (d11[valid] * d20[valid] - d01[valid] * d21[valid]) / denom[valid]
+    w = (d00[valid] * d21[valid] - d01[valid] * d20[valid]) / denom[valid]
+    weights[valid] = np.stack((1 - v - w, v, w), axis=1)
 
-def bake_texture_to_color_attr(context, obj, material, color_attr_name, min_amount_vertices, mode='OBJECT'):
-    # edit mode for subdivision
-    general.activate_object(context, obj, mode='EDIT')
+    weights = np.clip(weights, 0, None)
+    sums = weights.sum(axis=1)
+    weights[sums <= 0] = 1 / 3
+    sums[sums <= 0] = 1
 
-    # subdivide
-    general.subdivide_until_vertex_count(obj, min_amount_vertices)  # minimum n vertices for good baking
+    return weights / sums[:, None]
 
-    # object mode for baking
-    general.activate_object(context, obj, mode='OBJECT')
 
-    # remove the BSDF node
-    node_pb = material.node_tree.nodes['Principled BSDF']
-    material.node_tree.nodes.remove(node_pb)
+def get_transfer_weights(source_obj, target_co, method='barycentric', n=4):
+    """Source vertex indices (m, k) and their weights (m, k) to interpolate the source colors on the target points.
+    barycentric uses the closest point on the source surface, idw the inverse distances to the n closest vertices."""
+    if method not in COLOR_TRANSFER_METHODS:
+        raise Exception(f'Unknown color transfer method {method}.')
 
-    # add an emission node for baking with Emit
-    material.node_tree.nodes.new('ShaderNodeEmission')
+    if method == 'barycentric':
+        triangles = slicing.get_triangle_indices(source_obj)
+        if not len(triangles):
+            raise Exception(f'{source_obj.name} has no faces to transfer the colors from.')
 
-    # make the right connections
-    material.node_tree.links.new(
-        material.node_tree.nodes['Image Texture'].outputs['Color'],
-        material.node_tree.nodes['Emission'].inputs['Color']
-    )
-    material.node_tree.links.new(
-        material.node_tree.nodes['Emission'].outputs['Emission'],
-        material.node_tree.nodes['Material Output'].inputs['Surface']
-    )
+        # mathutils has no batch query, a single pass of C calls without further Python work per point
+        bvh = spatial_index.get_triangle_bvh_tree(source_obj)
+        nearest = [bvh.find_nearest(co) for co in target_co.tolist()]
+        locations = np.array([location for location, _, _, _ in nearest], dtype=np.float64)
+        source_ixs = triangles[np.array([index for _, _, index, _ in nearest], dtype=np.int64)]
 
-    # create a new vertex color property for baking the vertex colors to
-    mesh = obj.data
-    mesh.color_attributes.new(
-        name=color_attr_name,
-        type='FLOAT_COLOR',
-        domain='POINT',
-    )
+        source_co = selection.get_vertices_co(source_obj).astype(np.float64)
+        tri_co = source_co[source_ixs]
+        weights = get_barycentric_weights(locations, tri_co[:, 0], tri_co[:, 1], tri_co[:, 2])
+
+        return source_ixs, weights
 
-    # bake the texture in the ufit object before duplicating
-    context.scene.render.engine = 'CYCLES'  # changes to the CYCLES render engine
-    context.scene.render.bake.target = 'VERTEX_COLORS'  # bake vertex colors and not texture
-    context.scene.cycles.bake_type = 'EMIT'  # use the emit method
-    bpy.ops.object.bake(type='EMIT')
+    n = min(n, len(source_obj.data.vertices))
+    if n == 0:
+        raise Exception(f'{source_obj.name} has no vertices to transfer the colors from.')
 
-    # switch to requested mode
-    general.activate_object(context, obj, mode=mode)
+    kd = spatial_index.get_kd_tree(source_obj)
+    found = [kd.find_n(co, n) for co in target_co.tolist()]
+    source_ixs = np.array([[index for _, index, _ in closest] for closest in found], dtype=np.int64)
+    distances = np.array([[distance for _, _, distance in closest] for closest in found], dtype=np.float64)
+
+    # inverse distance weights, a vertex on the same position takes over its color
+    exact = distances <= 1e-9
+    weights = np.where(exact.any(axis=1)[:, None], exact, 1 / np.maximum(distances, 1e-9))
+
+    return source_ixs, weights / weights.sum(axis=1)[:, None]
+
+
+def transfer_color_attr_source_target(source_obj, target_obj, source_color_attr_name, target_color_attr_name,
+                                      method='barycentric'):
+    """Interpolates the (point) colors of source_obj on the vertices of target_obj, both in local coordinates"""
+    source_color_attr = source_obj.data.color_attributes[source_color_attr_name]
+    target_color_attr = target_obj.data.color_attributes[target_color_attr_name]
+    if source_color_attr.domain != 'POINT' or target_color_attr.domain != 'POINT':
+        raise Exception('Colors can only be transferred between color attributes on the vertices.')
+
+    target_co = selection.get_vertices_co(target_obj)
+    source_ixs, weights = get_transfer_weights(source_obj, target_co, method=method)
+
+    source_colors = get_colors(source_color_attr).astype(np.float64)
+    colors = np.einsum('ij,ijk->ik', weights, source_colors[source_ixs])
+
+    # change alpha but keep the same color
+    set_colors(target_color_attr, change_alpha_rgb_colors(colors, alpha=0.9, keep_color=True))
+
+
+def sample_texture_to_color_attr(obj, material, color_attr_name):
+    """Writes the colors of the image texture of the material on the vertices to a (new) point color attribute"""
+    colors = texture_sampling.sample_texture_on_vertices(obj, texture_sampling.get_texture_image(material))
+
+    mesh = obj.data
+    color_attr = mesh.color_attributes.get(color_attr_name)
+    if color_attr is None or color_attr.domain != 'POINT':
+        if color_attr is not None:
+            mesh.color_attributes.remove(color_attr)
+        color_attr = mesh.color_attributes.new(
+            name=color_attr_name,
+            type='FLOAT_COLOR',
+            domain='POINT',
+        )
+
+    set_colors(color_attr, colors)
 
 
 def remesh_with_texture_to_color_attr(context, obj, color_attr_name='original_colors'):
@@ -118,8 +184,9 @@ def remesh_with_texture_to_color_attr(context, obj, color_attr_name='original_co
     if len(obj.data.materials):
         material = obj.data.materials[obj.active_material_index]
 
-        # bake texture to color attributes
-        bake_texture_to_color_attr(context, obj, material, 'scan_colors', 100000, mode='OBJECT')
+        # sample the texture to color attributes
+        general.activate_object(context, obj, mode='OBJECT')
+        sample_texture_to_color_attr(obj, material, 'scan_colors')
 
         # duplicate the object
         obj_baked = general.duplicate_obj(obj, f'{obj.name}_Baked', context.collection, data=True, actions=False)
@@ -153,78 +220,67 @@ def remesh_with_texture_to_color_attr(context, obj, color_attr_name='original_co
         general.delete_obj_by_name_contains(f'{obj.name}_Baked')
 
 
-def get_vertices_by_color_exclude(obj, color_attr_name, color_exclude: Vector((0.0, 0.0, 0.0, 0.0))):
-    mesh = obj.data
-    color_layer = mesh.color_attributes.get(color_attr_name)
-
-    if color_layer and len(color_layer.data) > 0:
-        color_attr = color_layer.data
-
-        result_verts = []
-        for vert in mesh.vertices:
-            color = Vector(color_attr[vert.index].color)
+def get_color_exclude_mask(obj, color_attr_name, color_exclude, tolerance=True):
+    """Mask of the vertices of which the color differs from color_exclude (None if there is no such color layer).
+    With tolerance, the colors within 20 % of color_exclude on all elements are excluded as well."""
+    color_layer = obj.data.color_attributes.get(color_attr_name)
+    if not color_layer or len(color_layer.data) == 0:
+        return None
 
-            # increase performance by first comparing exact
-            if not color == color_exclude:
-                # max 20 % difference on all elements of the vectors compared
-                if not np.isclose(Vector(color), color_exclude, rtol=0.2, atol=0.2).all():
-                    result_verts.append(vert)
+    colors = get_colors(color_layer)
+    color_exclude = np.array(color_exclude, dtype=np.float32)
 
-        return result_verts
+    mask = np.any(colors != color_exclude, axis=1)
+    if tolerance:
+        mask &= ~np.isclose(colors, color_exclude, rtol=0.2, atol=0.2).all(axis=1)
 
+    return mask
 
-def get_vertices_by_color_exclude_simple(obj, color_attr_name, color_exclude: Vector((0.0, 0.0, 0.0, 0.0))):
-    mesh = obj.data
-    color_layer = mesh.color_attributes.get(color_attr_name)
 
-    if color_layer and len(color_layer.data) > 0:
-        color_attr = color_layer.data
+def get_color_weights(obj, color_attr_name, base_color=(1, 1, 1, 1)):
+    """Painted intensity per vertex: the largest difference of the rgb values with the base color (0 to 1)"""
+    colors = get_colors(obj.data.color_attributes[color_attr_name])
+    difference = np.abs(colors[:, :3] - np.array(base_color[:3], dtype=np.float32))
 
-        result_verts = []
-        for vert in mesh.vertices:
-            color = Vector(color_attr[vert.index].color)
+    return np.clip(difference.max(axis=1), 0, 1)
 
-            # increase performance by only comparing exact
-            if not color == color_exclude:
-                result_verts.append(vert)
 
-        return result_verts
+def count_vertices_by_color_exclude(obj, color_attr_name, color_exclude: Vector((0.0, 0.0, 0.0, 0.0))):
+    # number of vertices of which the color differs exactly from color_exclude (cheap enough for a poll)
+    mask = get_color_exclude_mask(obj, color_attr_name, color_exclude, tolerance=False)
+    return 0 if mask is None else int(np.count_nonzero(mask))
 
 
 def select_vertices_by_color_exclude(context, obj, color_attr_name, color_exclude: Vector((0.0, 0.0, 0.0, 0.0))):
     # select vertices by color attribute layer - exclude default color black
-    colored_verts = get_vertices_by_color_exclude(obj, color_attr_name, color_exclude)
+    colored_verts_mask = get_color_exclude_mask(obj, color_attr_name, color_exclude)
 
     # switch to edit mode after vertices are retrieved
     general.activate_object(context, obj, mode='EDIT')
-    general.deselect_in_edit_mode(context)
 
-    # effectively select the vertices
-    general.select_verts(obj, colored_verts)
+    # effectively select the vertices (and deselect all others)
+    general.select_verts_by_idx(obj, np.flatnonzero(colored_verts_mask))
 
 
 def color_selected_vertices(context, obj, color_attr_name, color: Vector((0.0, 0.0, 0.0, 0.0))):
     # make sure you are in edit mode
     general.activate_object(context, obj, mode='EDIT')
 
-    # get the index of the selected vertices
-    selected_verts_ix = general.get_selected_vertices_ix(context)
+    # get the mask of the selected vertices
+    selected_verts_mask = selection.get_select_mask(obj)
 
     # activate object mode
     general.activate_object(context, obj, mode='OBJECT')
 
-    # get the color layer (needs to be in Object mode)
-    color_layer = obj.data.color_attributes.get(color_attr_name)
-
-    # give color to the selected vertices
-    for vert_idx in selected_verts_ix:
-        color_layer.data[vert_idx].color = color
+    # give color to the selected vertices (the color layer needs to be in Object mode)
+    set_vertices_color(obj, color_attr_name, selected_verts_mask, color)
 
 
-def set_vertices_color(obj, color_attr_name, vertices, color):
-    mesh = obj.data
-    color_layer = mesh.color_attributes.get(color_attr_name)
+def set_vertices_color(obj, color_attr_name, vertices_ix, color):
+    # vertices_ix can be vertex indices or a vertex mask (point domain)
+    color_layer = obj.data.color_attributes.get(color_attr_name)
 
-    # set color for all vertices
-    for vertex in vertices:
-        color_layer.data[vertex.index].color = color
+    # set color for all vertices at once
+    colors = get_colors(color_layer)
+    colors[vertices_ix] = color
+    set_colors(color_layer, colors)
@@ -0,0 +1,76 @@
+# Tracking of the z-band of a mesh that changed since its circumferences were last measured.
+# Only the circumferences within that band need to be remeasured, the others keep their cached values.
+
+import bpy
+import math
+import functools
+from contextlib import contextmanager
+
+import numpy as np
+
+from . import slicing
+
+# dirty z-band (z_min, z_max) per object name
+dirty_z_bands = {}
+
+
+def get_dirty_z_band(obj_name):
+    return dirty_z_bands.get(obj_name)
+
+
+def clear_dirty_z_band(obj_name):
+    dirty_z_bands.pop(obj_name, None)
+
+
+def add_dirty_z_band(obj_name, z_min, z_max):
+    band = dirty_z_bands.get(obj_name)
+    if band:
+        z_min, z_max = min(band[0], z_min), max(band[1], z_max)
+    dirty_z_bands[obj_name] = (z_min, z_max)
+
+
+def mark_all_dirty(obj_name):
+    dirty_z_bands[obj_name] = (-math.inf, math.inf)
+
+
+def is_z_dirty(obj_name, z):
+    band = dirty_z_bands.get(obj_name)
+    return band is not None and band[0] <= z <= band[1]
+
+
+@contextmanager
+def track_z_changes(obj):
+    """Adds the z-range of the triangles touching the vertices changed within the block to the dirty band"""
+    obj_name = obj.name
+    co_before = slicing.get_world_co(obj)
+    try:
+        yield
+    finally:
+        co_after = slicing.get_world_co(obj)
+
+        if co_before.shape != co_after.shape:
+            # topology changed, nothing of the previous measurement can be reused
+            mark_all_dirty(obj_name)
+        else:
+            changed = np.any(co_before != co_after, axis=1)
+            if changed.any():
+                # a slice changes when it crosses a triangle with a moved vertex (before or after the move)
+                tris = slicing.get_triangle_indices(obj)
+                tris = tris[changed[tris].any(axis=1)]
+                z = np.concatenate((co_before[tris, 2].ravel(), co_after[tris, 2].ravel(),
+                                    co_before[changed, 2], co_after[changed, 2]))
+                add_dirty_z_band(obj_name, float(z.min()), float(z.max()))
+
+
+def tracks_z_changes(obj_name):
+    """Decorator tracking the z-changes of the object with the given name (if it exists) during the call"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            obj = bpy.data.objects.get(obj_name)
+            if obj is None:
+                return func(*args, **kwargs)
+            with track_z_changes(obj):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -4,7 +4,8 @@ import bmesh
 import math
 import numpy as np
 from mathutils import Vector, Matrix, kdtree
-from . import user_interface
+from . import user_interface, selection, spatial_index, point_ordering, topology, normal_offset, \
+    vertex_groups, mesh_builder, transforms
 from .....base.src.base_constants import base_path_consts
 from .....config_ufit import logger
 
@@ -74,19 +75,8 @@ def deselect_in_edit_mode(context):
 
 
 def deselect_in_object_mode(context):
-    # 2. deselect vertices, faces and edges
-    face = context.object.data.polygons  # not faces!
-    edge = context.object.data.edges
-    vert = context.object.data.vertices
-
-    # vertices can be selected
-    # to deselect vertices you need to deselect faces(polygons) and edges at first
-    for f in face:
-        f.select = False
-    for e in edge:
-        e.select = False
-    for v in vert:
-        v.select = False
+    # deselect vertices, faces and edges
+    selection.deselect_all(context.object)
 
 
 def deselect_edges_by_idx(context, indexes):
@@ -112,68 +102,28 @@ def select_edges_by_idx(context, indexes):
 
 
 def get_selected_vertices(context):
-    obj = context.edit_object.data
-    bm = bmesh.from_edit_mesh(obj)
-
-    selected_vertices = []
-    for v in bm.verts:
-        if v.select:
-            # you need to make a type of copy to avoid indexes become useless
-            selected_vertices.append({
-                'idx': v.index,
-                'co': v.co
-            })
+    obj = context.edit_object
+    selected_ix = selection.get_selected_ix(obj)
+    selected_co = selection.get_vertices_co(obj)[selected_ix]
 
-    bm.select_flush_mode()
-    return selected_vertices
+    # copies of the coordinates, so they stay valid when the mesh changes
+    return [{'idx': int(ix), 'co': Vector(co)} for ix, co in zip(selected_ix, selected_co)]
 
 
 def get_selected_vertices_co(context):
-    obj = context.edit_object.data
-    bm = bmesh.from_edit_mesh(obj)
-
-    selected_vertices = []
-    for f in bm.verts:
-        if f.select:
-            selected_vertices.append(f.co)
-
-    bm.select_flush_mode()
-    return selected_vertices
+    return [Vector(co) for co in selection.get_selected_vertices_co(context.edit_object)]
 
 
 def get_selected_vertices_ix(context):
-    obj = context.edit_object.data
-    bm = bmesh.from_edit_mesh(obj)
-
-    selected_vertices = []
-    for f in bm.verts:
-        if f.select:
-            selected_vertices.append(f.index)
-
-    bm.select_flush_mode()
-    return selected_vertices
+    return selection.get_selected_ix(context.edit_object).tolist()
 
 
 def get_selected_edges(context):
-    obj = context.edit_object.data
-    bm = bmesh.from_edit_mesh(obj)
-
-    selected_edges = []
-    for f in bm.edges:
-        if f.select:
-            selected_edges.append(f.index)
-
-    bm.select_flush_mode()
-    return selected_edges
+    return selection.get_selected_ix(context.edit_object, domain='edges').tolist()
 
 
 def get_selected_max_z(obj):
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    z_locs = [v.co.z for v in bm.verts if v.select]
-
-    return max(z_locs)
+    return float(selection.get_selected_vertices_co(obj)[:, 2].max())
 
 
 def set_selected_to_z(obj, new_z):
@@ -252,44 +202,24 @@ def get_distance(point1: Vector, point2: Vector) -> float:
     return (point2 - point1).length
 
 
-def set_object_origin(bottom_vertex):
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # set the location of the cursor
-    bpy.context.scene.cursor.location = bottom_vertex
-
-    # use the location of the cursor as origin (no better way to do this)
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+def set_object_origin(obj, point):
+    # use the (world) point as origin, the object has to be in object mode
+    transforms.set_origin_world(obj, point)
 
 
 def select_verts_by_co(obj, vert_coordinates):
     # activate vert selection mode
     bpy.ops.mesh.select_mode(type='VERT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-
-    bpy.ops.object.editmode_toggle()
-    for v in obj.data.vertices:
-        if v.co in vert_coordinates:
-            v.select = True
-    bpy.ops.object.editmode_toggle()
+    selection.select_vertices_by_co(obj, vert_coordinates)
 
 
 def select_verts_by_idx(obj, vert_idx):
     # activate vert selection mode
     bpy.ops.mesh.select_mode(type='VERT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bpy.ops.object.editmode_toggle()
-    for v in obj.data.vertices:
-        if v.index in vert_idx:
-            v.select = True
-    bpy.ops.object.editmode_toggle()
+    selection.select_vertices_by_ix(obj, vert_idx)
 
 
 def select_verts(obj, verts):
-    # activate vert selection mode
-    bpy.ops.mesh.select_mode(type='VERT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-
     verts_idx = [v.index for v in verts]
 
     select_verts_by_idx(obj, verts_idx)
@@ -352,58 +282,20 @@ def apply_transform(obj, use_location=False, use_rotation=False, use_scale=False
 
 
 def scale_distance(obj, distance):
-    # get bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    for v in bm.verts:
-        # move the vertices
-        norms = [f.normal for f in v.link_faces]
-        n = sum(norms, Vector()) / len(norms)
-        v.co += distance * n
-
-    bmesh.update_edit_mesh(me)
+    # move the vertices along the average normal of their faces
+    normal_offset.offset_vertices(obj, distance)
 
 
 def scale_distance_xy(obj, distance):
-    # get bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    for v in bm.verts:
-        # move the vertices
-        norms = []
-        for f in v.link_faces:
-            vec = Vector((f.normal.x, f.normal.y, 0.1 * f.normal.z))
-            vec.normalize()
-            norms.append(vec)
-
-        if norms:
-            n = sum(norms, Vector()) / len(norms)
-            v.co += distance * n
-
-    bmesh.update_edit_mesh(me)
+    # move the vertices mainly in the xy direction (the z component of the face normals is damped)
+    normal_offset.offset_vertices(obj, distance, z_damping=0.1)
 
 
 def scale_selected_verts_distance_xy(obj, distance):
-    # get bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    selected_verts = [v for v in bm.verts if v.select]
-
-    for v in selected_verts:
-        # move the vertices
-        norms = []
-        for f in v.link_faces:
-            if f.select:
-                vec = Vector((f.normal.x, f.normal.y, 0))
-                vec.normalize()
-                norms.append(vec)
-        n = sum(norms, Vector()) / len(norms)
-        v.co += distance * n
-
-    bmesh.update_edit_mesh(me)
+    # move the selected vertices in the xy direction, along the normals of the selected faces
+    normal_offset.offset_vertices(obj, distance, z_damping=0.0,
+                                  face_mask=selection.get_select_mask(obj, domain='polygons'),
+                                  vertex_mask=selection.get_select_mask(obj))
 
 
 def activate_object(context, active_obj, mode='OBJECT', hide_select_all=True):
@@ -438,19 +330,9 @@ def activate_object(context, active_obj, mode='OBJECT', hide_select_all=True):
 
 
 def order_verts_by_closest(verts):
-    ordered_verts = []
-    non_ordered_verts = verts.copy()
-    for i in range(0, len(verts)):
-        if i == 0:
-            ordered_verts.append(non_ordered_verts[0])
-        else:
-            vert = ordered_verts[-1]
-            non_ordered_verts.sort(reverse=False, key=lambda v: get_distance(v, vert))
-            ordered_verts.append(non_ordered_verts[0])
-
-        del non_ordered_verts[0]
-
-    return ordered_verts
+    # nearest neighbour chaining with a KD-tree
+    order = point_ordering.order_by_nearest(np.array(verts, dtype=np.float64))
+    return [verts[i] for i in order]
 
 
 def creat_path_by_points(cpath, points):
@@ -540,17 +422,8 @@ def rollback_to_blender_history_point(point_name):
 
 
 def get_kd_tree(obj):
-    # get the mesh
-    mesh = obj.data
-    size = len(mesh.vertices)
-    kd = kdtree.KDTree(size)
-
-    # Create a kd-tree from the mesh vertices
-    for i, v in enumerate(mesh.vertices):
-        kd.insert(v.co, i)
-    kd.balance()
-
-    return kd
+    # cached per object and geometry, only rebuilt when the mesh changed
+    return spatial_index.get_kd_tree(obj)
 
 
 def find_closest_vertex_ix(obj, point):
@@ -578,22 +451,15 @@ def select_vertices_within_distance_of_selected(obj, max_distance):
     # make sure you are in edit mode
     activate_object(bpy.context, obj, mode='EDIT')
 
-    # create a kd-tree from a mesh
-    bm = bmesh.from_edit_mesh(obj.data)
-
     # get kd tree
     kd = get_kd_tree(obj)
 
-    # ensure the bmesh has an up-to-date index table
-    bm.verts.ensure_lookup_table()
-
     # select verts within a radius
-    for v in [v for v in bm.verts if v.select]:
-        co_find = v.co
-        for (co, index, dist) in kd.find_range(co_find, max_distance):
-            bm.verts[index].select = True
+    selected_ix = []
+    for co_find in selection.get_selected_vertices_co(obj).tolist():
+        selected_ix.extend(index for (co, index, dist) in kd.find_range(co_find, max_distance))
 
-    bmesh.update_edit_mesh(obj.data)
+    selection.select_vertices_by_ix(obj, selected_ix, extend=True)
 
 
 def subdivide_until_vertex_count(obj, n):
@@ -609,25 +475,15 @@ def subdivide_until_vertex_count(obj, n):
 
 
 def move_verts_along_faces_normal(obj, distance, verts_weights=None):
-    # create bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    # move the selected vertices along normals
-    verts = set(v for f in bm.faces if f.select for v in f.verts)
-    for v in verts:
-        # move the vertices
-        norms = [f.normal for f in v.link_faces if f.select]
-        n = sum(norms, Vector()) / len(norms)
-
-        if not verts_weights:
-            v.co += distance * n
-        else:
-            v.co += verts_weights[v.index] * distance * n
+    # move the vertices of the selected faces along the normals of the selected faces
+    # verts_weights is indexed by the vertex index (a list/array or a dict)
+    weights = verts_weights
+    if isinstance(verts_weights, dict):
+        weights = np.zeros(len(obj.data.vertices))
+        weights[list(verts_weights.keys())] = list(verts_weights.values())
 
-        # v.select = False
-
-    bmesh.update_edit_mesh(me)
+    normal_offset.offset_vertices(obj, distance, face_mask=selection.get_select_mask(obj, domain='polygons'),
+                                  weights=weights)
 
 
 def get_orientation_matrix_by_normal(normal):
@@ -674,47 +530,23 @@ def move_selected_verts_along_local_axis(obj, distance, axis=(False, False, Fals
 
 
 def increase_selected_vertices_region(obj, amount):
-    # create bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
+    # start from the vertices of the selected faces
+    loop_verts, loop_starts, loop_totals = topology.get_face_loops(obj)
+    face_mask = selection.get_select_mask(obj, domain='polygons')
+    verts_mask = np.zeros(len(obj.data.vertices), dtype=bool)
+    verts_mask[loop_verts[np.repeat(face_mask, loop_totals)]] = True
 
-    verts = set(v for f in bm.faces if f.select for v in f.verts)
-    increased_verts = set(verts)
-    for i in range(amount):
-        new_increased_verts = increased_verts.copy()
-        for v in increased_verts:
-            for f in v.link_faces:
-                new_increased_verts.update([vert for vert in f.verts])
-        increased_verts = new_increased_verts
+    # add the vertices of the linked faces, ring by ring
+    increased_mask = topology.dilate(obj, verts_mask, rings=amount, kind='faces')
 
     # select all vertices
-    for v in increased_verts:
-        v.select = True
-
-    bmesh.update_edit_mesh(me)
-
-
-# check if a vertex is near the border of the selection
-def is_vertex_near_border(vertex, selection):
-    for neighbor in vertex.link_edges:
-        if neighbor.other_vert(vertex) not in selection:
-            return True
-    return False
+    selection.set_vertex_select_mask(obj, increased_mask | selection.get_select_mask(obj))
 
 
 def decrease_selected_vertices_region(obj, amount):
-    # create bmesh
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    for i in range(amount):
-        selected_verts = set(v for v in bm.verts if v.select)
-        for v in selected_verts:
-            if is_vertex_near_border(v, selected_verts):
-                v.select = False
-
-    bm.select_flush(False)  # update selection status
-    bmesh.update_edit_mesh(me)
+    # deselect the vertices near the border of the selection, ring by ring
+    decreased_mask = topology.erode(obj, selection.get_select_mask(obj), rings=amount, kind='edges')
+    selection.set_vertex_select_mask(obj, decreased_mask)
 
 
 def find_closest_vertices_kdtree(source_obj, target_obj):
@@ -723,15 +555,15 @@ def find_closest_vertices_kdtree(source_obj, target_obj):
     # Create a dictionary to store closest vertices
     closest_vertices = {}
 
-    # Create kdTree for target_obj
+    # Get the kdTree of target_obj
     target_kd_tree = get_kd_tree(target_obj)
 
     # Loop through vertices of source_obj
-    for source_vertex in source_obj.data.vertices:
-        _, closest_index, _ = target_kd_tree.find(source_vertex.co)
+    for source_ix, source_co in enumerate(selection.get_vertices_co(source_obj).tolist()):
+        _, closest_index, _ = target_kd_tree.find(source_co)
 
         # Store closest vertex index in dictionary
-        closest_vertices[source_vertex.index] = closest_index
+        closest_vertices[source_ix] = closest_index
 
     return closest_vertices
 
@@ -742,19 +574,13 @@ def find_closest_n_vertices_kdtree(source_obj, target_obj, n=4):
     # Create a dictionary to store closest vertices
     closest_vertices = {}
 
-    # Create kdTree for source_obj
+    # Get the kdTree of target_obj
     target_kd_tree = get_kd_tree(target_obj)
 
-    # Loop through vertices of target_obj
-    for source_vertex in source_obj.data.vertices:
-        _, closest_index, _ = target_kd_tree.find(source_vertex.co)
-
-        closest_verts = []
-        for (co, index, distance) in target_kd_tree.find_n(source_vertex.co, n=n):  # find the closest x verts
-            closest_verts.append(index)
-
-        # Store closest vertex index in dictionary
-        closest_vertices[source_vertex.index] = closest_verts
+    # Loop through vertices of source_obj
+    for source_ix, source_co in enumerate(selection.get_vertices_co(source_obj).tolist()):
+        # find the closest x verts
+        closest_vertices[source_ix] = [index for (co, index, distance) in target_kd_tree.find_n(source_co, n=n)]
 
     return closest_vertices
 
@@ -769,100 +595,74 @@ def select_vertices_from_vertex_groups(context, obj, vg_names):
     # edit mode
     activate_object(context, obj, mode='EDIT')
 
-    # deselect all vertices
-    bpy.ops.mesh.select_all(action='DESELECT')
-
-    for vg in vg_names:
-        # activate the vertex group
-        activate_vertex_group(context, obj, vg)
+    # select the vertices of the vertex groups (and deselect all others)
+    vertex_groups.select_groups(obj, vg_names)
 
-        # select the vertices
-        bpy.ops.object.vertex_group_select()
+    # activate the (last) vertex group, as the vertex group operators work on the active group
+    if vg_names:
+        activate_vertex_group(context, obj, vg_names[-1])
 
 
 def deselect_vertices_from_vertex_groups(context, obj, vg_names):
-    for vg in vg_names:
-        # activate the vertex group
-        activate_vertex_group(context, obj, vg)
+    if not vg_names:
+        return
 
-        # deselect the vertices
-        bpy.ops.object.vertex_group_deselect()
+    # deselect the vertices
+    vertex_groups.deselect_groups(obj, vg_names)
+
+    # activate the (last) vertex group, as the vertex group operators work on the active group
+    activate_vertex_group(context, obj, vg_names[-1])
 
 
 def get_vertices_from_vertex_group(obj, vg_name):
-    # Get the vertex group
-    vg_index = obj.vertex_groups[vg_name].index
+    # Get the indices and coordinates of the vertices in the vertex group
+    vertices_ix = vertex_groups.get_group_ix(obj, [vg_name])
+    vertices_co = selection.get_vertices_co(obj)[vertices_ix]
 
-    # Get the mesh data
-    mesh = obj.data
+    return [{'idx': ix, 'co': Vector(co)} for ix, co in zip(vertices_ix.tolist(), vertices_co.tolist())]
 
-    # Loop through the vertices and get their coordinates if they are in the vertex group
-    vertices = []
-    for vert in mesh.vertices:
-        for group in vert.groups:
-            if group.group == vg_index:
-                vertices.append({
-                    'idx': vert.index,
-                    'co': vert.co
-                })
 
-    return vertices
+def get_vertices_ix_from_multiple_vertex_groups(obj, vg_names):
+    # indices of the vertices in any of the vertex groups (all memberships are read at once)
+    return vertex_groups.get_group_ix(obj, vg_names)
 
-def get_vertices_from_multiple_vertex_groups(obj, vg_names):
-    # Get vertex groups indeces
-    index_vgs = [obj.vertex_groups[vg].index for vg in vg_names]
 
-    # Get the mesh data
-    mesh = obj.data
+def expand_border_vertices(obj, vertices_ix, safety_margins):
+    """Returns a vertex mask per safety margin: the border vertices and all vertices within the margin of them"""
+    co = selection.get_vertices_co(obj)
+    border_mask = np.zeros(len(co), dtype=bool)
+    border_mask[vertices_ix] = True
 
-    # Loop over all vertices and store them if they are in the vertex groups
-    vertices = []
-    for vert in mesh.vertices:
-        for group in vert.groups:
-            if group.group in index_vgs:
-                vertices.append(vert)
-    return vertices
+    masks = [border_mask.copy() for _ in safety_margins]
+    if not border_mask.any():
+        return masks
 
+    # only the vertices in the bounding box of the border (extended by the margin) can be within the margin
+    border_co = co[border_mask]
+    max_margin = max(safety_margins)
+    in_bbox = np.all((co > border_co.min(axis=0) - max_margin) & (co < border_co.max(axis=0) + max_margin), axis=1)
+    candidates_ix = np.flatnonzero(in_bbox & ~border_mask)
 
-def expand_border_vertices(obj, vertices, safety_margin):
-    # Get the mesh data
-    mesh = obj.data
-
-    # Loop over all the vertices of the obj and calculate the distance to the border vertices
-    additional_vertices = []
-    for vertex in mesh.vertices:
-        for vertex_border in vertices:
-
-            # Skip calculation if vertex is part of the border
-            if vertex_border.index == vertex.index:
-                continue
+    # distance of every candidate to the closest border vertex, in a single pass for all margins
+    kd = kdtree.KDTree(len(border_co))
+    for i, v_co in enumerate(border_co.tolist()):
+        kd.insert(v_co, i)
+    kd.balance()
+    distances = np.array([kd.find(v_co)[2] for v_co in co[candidates_ix].tolist()], dtype=np.float64)
 
-            distance = (vertex.co - vertex_border.co).length
-            if distance < safety_margin:
-                additional_vertices.append(vertex)
-                break  # stop once the vertex is found whithin the distance (no need to compare with the others)
+    for mask, safety_margin in zip(masks, safety_margins):
+        mask[candidates_ix[distances < safety_margin]] = True
 
-    return vertices + additional_vertices
+    return masks
 
 
 def move_vertices_from_vertex_group(obj, vg_name, vector):
-    # Create a bmesh from the object
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    # Get the vertex group
-    vg_index = obj.vertex_groups[vg_name].index
-
-    # Get the vertices in the vertex group (bmesh doesn't have groups)
-    verts = [v.index for v in obj.data.vertices if vg_index in [vg.group for vg in v.groups]]
-    bm_verts = [v for v in bm.verts if v.index in verts]
-
-    # Move the vertices
-    for v in bm_verts:
-        v.co += vector
+    # Move the vertices in the vertex group
+    co = selection.get_vertices_co(obj)
+    co[vertex_groups.get_group_mask(obj, [vg_name])] += np.array(vector, dtype=np.float32)
 
     # Update the mesh
-    bmesh.update_edit_mesh(me)
+    selection.set_vertices_co(obj, co)
 
 
 def get_depsgraph_object(context, obj):
@@ -882,51 +682,18 @@ def get_depsgraph_mesh(context, obj, mode='OBJECT'):
     return mesh_eval
 
 
-def create_obj_from_selection(context, obj_name, copy_vg=False):
+def create_obj_from_selection(context, obj_name, copy_vg=False, copy_colors=False):
     obj = context.edit_object
-    me = obj.data
-    bm = bmesh.from_edit_mesh(me)
-
-    selected_verts = [v for v in bm.verts if v.select]
-    selected_faces = [f for f in bm.faces if f.select]
-
-    # establishes a map between the new mesh vertex indices and
-    # actual mesh vertex indices (required for the function from_pydata)
-    vmap = dict()
-    for i, vert in enumerate(selected_verts):
-        vmap[vert.index] = i
-
-    # vertices for function from_pydata
-    vertices = [v.co for v in selected_verts]
-
-    # build faces with new indices
-    faces = []
-    for face in selected_faces:
-        faces.append([vmap[v.index] for v in face.verts])
 
     # Create a new object from the selected vertices and faces
-    new_mesh = bpy.data.meshes.new(name=obj_name)
-    new_mesh.from_pydata(vertices, [], faces)
-    new_obj = bpy.data.objects.new(name=obj_name, object_data=new_mesh)
-
-    if copy_vg:
-        # copy vertex groups
-        vg_groups = {}
-        for vg in obj.vertex_groups:
-            verts = [v for v in obj.data.vertices if vg.index in [vg.group for vg in v.groups]]
-            vg_group_verts = [vmap[v.index] for v in verts if v.index in vmap]
-            if vg_group_verts:
-                vg_groups[vg.name] = vg_group_verts
-
-        for name in vg_groups.keys():
-            new_vg_group = new_obj.vertex_groups.new(name=name)
-            new_vg_group.add(vg_groups[name], 1.0, 'REPLACE')
+    new_obj = mesh_builder.create_obj_from_masks(obj, obj_name,
+                                                 vertex_mask=selection.get_select_mask(obj),
+                                                 face_mask=selection.get_select_mask(obj, domain='polygons'),
+                                                 copy_vertex_groups=copy_vg, copy_colors=copy_colors)
 
     # Link the new object to the scene
     context.scene.collection.objects.link(new_obj)
 
-    bm.select_flush_mode()
-
     return new_obj
 
 
@@ -1002,12 +769,8 @@ def return_to_default_state(context, object_name, light, color_type, overlay_axe
 
 
 def filter_close_vertex_array(arr, rtol, atol):
-    filtered_arr = [arr[0]]
-    for value in arr[1:]:
-        if not np.isclose(Vector(value), Vector(filtered_arr[-1]), rtol=rtol, atol=atol).all():
-            filtered_arr.append(value)
-
-    return filtered_arr
+    keep = point_ordering.filter_close_points(np.array(arr, dtype=np.float64), rtol=rtol, atol=atol)
+    return [arr[i] for i in keep]
 
 
 def add_image_texture(texture_name, file_dir, file_name, extension='EXTEND'):
@@ -1076,25 +839,12 @@ def deselect_non_loop_edges(obj):
 
 
 def get_outer_vertices_selection(obj):
-    mesh = obj.data
-    bm = bmesh.from_edit_mesh(mesh)
-
-    selected_verts = [v for v in bm.verts if v.select]
-
-    outer_verts = []
-    for vert in selected_verts:
-        # Check if all neighboring vertices are also selected
-        if is_vertex_near_border(vert, selected_verts):
-            outer_verts.append({
-                'idx': vert.index,
-                'co': vert.co
-            })
+    # the selected vertices with an unselected neighbour (the border of the selection)
+    selected_mask = selection.get_select_mask(obj)
+    outer_mask = selected_mask & ~topology.erode(obj, selected_mask, rings=1, kind='edges')
+    vertices_co = selection.get_vertices_co(obj)
 
-    # Ensure the BMesh is freed
-    # bmesh.update_edit_mesh(mesh)
-    bm.free()
-
-    return outer_verts
+    return [{'idx': int(ix), 'co': Vector(vertices_co[ix])} for ix in np.flatnonzero(outer_mask)]
 
 
 def ratio_center_border_distance_vertices(center_vert, border_verts, selected_verts):
@@ -1131,72 +881,24 @@ def create_new_vertex_group_for_selected(context, obj, vg_name, mode='OBJECT'):
 
     vertex_group = obj.vertex_groups.new(name=vg_name)  # make sure you are in object mode
     vertex_group.add(selected_vertices, 1, 'REPLACE')
+    vertex_groups.invalidate(obj)
 
     # return to the required mode
     bpy.ops.object.mode_set(mode=mode)
 
 
 def get_non_manifold_areas(context, obj, max_verts=None):
+    """Returns the non-manifold areas (holes) as vertex index arrays, the area with the most vertices first"""
     activate_object(context, obj, mode='EDIT')
 
-    # select holes/non-manifold
-    bpy.ops.mesh.select_non_manifold()
-    obj = obj.data
-    bm = bmesh.from_edit_mesh(obj)
-
-    # get all non-manifold vertices
-    non_manifold_vertices = []
-    for v in bm.verts:
-        if v.select:
-            non_manifold_vertices.append(v)
-
-    # get for each non-manifold vertex the non-manifold neighbours
-    verts_neighbours = {}
-    for vert in non_manifold_vertices:
-        verts_neighbours[vert.index] = []
-        for e in vert.link_edges:
-            neighbour = e.other_vert(vert)
-            if neighbour in non_manifold_vertices:
-                verts_neighbours[vert.index].append(neighbour.index)
-
-    # get the non-manifold areas
-    i = 0
-    non_manifold_areas = {}
-    old_neighbours = set()
-    new_neighbours = {list(verts_neighbours.keys())[0]}  # take the first vertex
-    while len(verts_neighbours.keys()) > 0:
-        added_neighbours = new_neighbours - old_neighbours
-        old_neighbours = set(new_neighbours)  # make sure to make a deep copy
-
-        if added_neighbours:
-            for n in added_neighbours:
-                if verts_neighbours.get(n):
-                    new_neighbours.update(verts_neighbours.get(n))  # extend the set
-                    verts_neighbours.pop(n)
-        else:
-            non_manifold_areas[f'nm_{i}'] = list(new_neighbours)
-            old_neighbours = set()
-            new_neighbours = {list(verts_neighbours.keys())[0]}  # take the first vertex
-            i += 1
-
-        if len(verts_neighbours.keys()) == 0:
-            non_manifold_areas[f'nm_{i}'] = list(new_neighbours)
+    # the areas are the connected components of the non-manifold edges
+    areas = topology.get_components(topology.get_non_manifold_edges(obj))
 
     if max_verts:
-        # collect non_manifold areas with more than x vertices
-        areas_to_remove = []
-        for nm_area in non_manifold_areas:
-            if len(non_manifold_areas[nm_area]) > max_verts:
-                areas_to_remove.append(nm_area)
-
         # remove non_manifold areas with more than x vertices
-        for a in areas_to_remove:
-            non_manifold_areas.pop(a)
-
-    bm.select_flush_mode()
+        areas = [area for area in areas if len(area) <= max_verts]
 
-    # return selected_vertices
-    return non_manifold_areas
+    return {f'nm_{i}': area for i, area in enumerate(areas)}
 
 
 def create_non_manifold_vertex_groups(context, obj, max_verts=None):
@@ -1209,7 +911,8 @@ def create_non_manifold_vertex_groups(context, obj, max_verts=None):
     bpy.ops.object.mode_set(mode='OBJECT')
     for nma in non_manifold_areas:
         vertex_group = obj.vertex_groups.new(name=nma)
-        vertex_group.add(list(non_manifold_areas[nma]), 1, 'REPLACE')
+        vertex_group.add(non_manifold_areas[nma].tolist(), 1, 'REPLACE')
+    vertex_groups.invalidate(obj)
 
     return non_manifold_areas
 
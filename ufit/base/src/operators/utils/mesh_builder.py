@@ -0,0 +1,79 @@
+import bpy
+import numpy as np
+from . import selection, topology, vertex_groups
+
+# Building a new object from a part of a mesh (given as vertex and face masks), filled with foreach_set
+# instead of from_pydata with Python lists of coordinates and faces.
+
+
+def get_loop_mask(face_mask, loop_totals):
+    return np.repeat(face_mask, loop_totals)
+
+
+def copy_color_attributes(source_mesh, mesh, vertex_mask, loop_mask):
+    for color_attr in source_mesh.color_attributes:
+        if color_attr.domain == 'POINT':
+            element_mask = vertex_mask
+        elif color_attr.domain == 'CORNER':
+            element_mask = loop_mask
+        else:
+            continue
+
+        colors = np.empty(len(color_attr.data) * 4, dtype=np.float32)
+        color_attr.data.foreach_get('color', colors)
+
+        new_color_attr = mesh.color_attributes.new(name=color_attr.name, type=color_attr.data_type,
+                                                   domain=color_attr.domain)
+        new_color_attr.data.foreach_set('color', colors.reshape(-1, 4)[element_mask].ravel())
+
+
+def create_obj_from_masks(obj, obj_name, vertex_mask, face_mask, copy_vertex_groups=False, copy_colors=False):
+    """Creates a new (unlinked) object with the masked vertices and faces of obj, the vertices keep their order"""
+    co = selection.get_vertices_co(obj)
+    loop_verts, loop_starts, loop_totals = topology.get_face_loops(obj)
+    vertex_mask = np.asarray(vertex_mask, dtype=bool)
+    face_mask = np.asarray(face_mask, dtype=bool)
+
+    # map the vertex indices of obj to the indices in the new mesh
+    new_ix = np.full(len(co), -1, dtype=np.int32)
+    new_ix[vertex_mask] = np.arange(np.count_nonzero(vertex_mask), dtype=np.int32)
+
+    loop_mask = get_loop_mask(face_mask, loop_totals)
+    new_loop_verts = new_ix[loop_verts[loop_mask]]
+    if np.any(new_loop_verts < 0):
+        raise Exception('The faces of the new object contain vertices that are not part of it.')
+
+    new_loop_totals = loop_totals[face_mask]
+    new_loop_starts = np.cumsum(new_loop_totals) - new_loop_totals
+
+    # fill the new mesh
+    mesh = bpy.data.meshes.new(name=obj_name)
+    mesh.vertices.add(np.count_nonzero(vertex_mask))
+    mesh.vertices.foreach_set('co', co[vertex_mask].ravel())
+    mesh.loops.add(len(new_loop_verts))
+    mesh.loops.foreach_set('vertex_index', new_loop_verts)
+    mesh.polygons.add(len(new_loop_totals))
+    mesh.polygons.foreach_set('loop_start', new_loop_starts.astype(np.int32))
+    mesh.polygons.foreach_set('loop_total', new_loop_totals)
+    mesh.update(calc_edges=True)
+
+    if copy_colors:
+        # in edit mode the color attributes point to the BMesh layers (without data), so copy in object mode
+        edit_mode = obj.mode == 'EDIT'
+        if edit_mode:
+            bpy.ops.object.editmode_toggle()
+
+        copy_color_attributes(obj.data, mesh, vertex_mask, loop_mask)
+
+        if edit_mode:
+            bpy.ops.object.editmode_toggle()
+
+    new_obj = bpy.data.objects.new(name=obj_name, object_data=mesh)
+
+    if copy_vertex_groups:
+        names, vertex_ixs, group_ixs, weights = vertex_groups.get_memberships(obj)
+        kept = vertex_mask[vertex_ixs]
+        vertex_groups.set_memberships(new_obj, names, new_ix[vertex_ixs[kept]], group_ixs[kept], weights[kept],
+                                      skip_empty=True)
+
+    return new_obj
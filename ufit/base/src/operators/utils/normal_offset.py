@@ -0,0 +1,93 @@
+import numpy as np
+from . import selection, topology
+
+# Moving vertices along their normals (scaling, thickness, push/pull) with NumPy instead of bmesh loops.
+# The vertex normal is the (weighted) average of the unit normals of the faces around the vertex.
+VERTEX_NORMAL_WEIGHTINGS = ('uniform', 'area', 'angle')
+
+
+def normalize(vectors):
+    # zero vectors stay zero (as Vector.normalize does)
+    lengths = np.linalg.norm(vectors, axis=1)
+    return np.divide(vectors, lengths[:, None], out=np.zeros_like(vectors), where=lengths[:, None] > 0)
+
+
+def get_face_normals(co, loop_verts, loop_starts, loop_totals):
+    """Unit normals and areas of the faces (Newell's method, also for ngons)"""
+    loop_faces = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    next_loops = loop_starts[loop_faces] + (np.arange(len(loop_verts)) - loop_starts[loop_faces] + 1) \
+        % loop_totals[loop_faces]
+
+    face_normals = np.zeros((len(loop_starts), 3))
+    np.add.at(face_normals, loop_faces, np.cross(co[loop_verts], co[loop_verts[next_loops]]))
+    areas = np.linalg.norm(face_normals, axis=1) / 2
+
+    return normalize(face_normals), areas
+
+
+def get_corner_angles(co, loop_verts, loop_starts, loop_totals):
+    # angle of the face at every loop, between the edges to the previous and next vertex
+    loop_faces = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    loop_offsets = np.arange(len(loop_verts)) - loop_starts[loop_faces]
+    next_loops = loop_starts[loop_faces] + (loop_offsets + 1) % loop_totals[loop_faces]
+    prev_loops = loop_starts[loop_faces] + (loop_offsets - 1) % loop_totals[loop_faces]
+
+    to_next = normalize(co[loop_verts[next_loops]] - co[loop_verts])
+    to_prev = normalize(co[loop_verts[prev_loops]] - co[loop_verts])
+
+    return np.arccos(np.clip(np.sum(to_next * to_prev, axis=1), -1, 1))
+
+
+def get_vertex_offsets(co, loop_verts, loop_starts, loop_totals, z_damping=1.0, face_mask=None,
+                       weighting='uniform'):
+    """Returns the offset direction of every vertex and the mask of the vertices that have one.
+    z_damping scales the z component of the face normals before renormalizing (e.g. 0 for xy only),
+    face_mask limits the faces that are taken into account (e.g. the selected faces)."""
+    if weighting not in VERTEX_NORMAL_WEIGHTINGS:
+        raise Exception(f'Unknown vertex normal weighting {weighting}.')
+
+    face_normals, areas = get_face_normals(co, loop_verts, loop_starts, loop_totals)
+    if z_damping != 1.0:
+        face_normals[:, 2] *= z_damping
+        face_normals = normalize(face_normals)
+
+    loop_faces = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    if weighting == 'area':
+        loop_weights = areas[loop_faces]
+    elif weighting == 'angle':
+        loop_weights = get_corner_angles(co, loop_verts, loop_starts, loop_totals)
+    else:
+        loop_weights = np.ones(len(loop_verts))
+
+    used_loops = face_mask[loop_faces] if face_mask is not None else np.ones(len(loop_verts), dtype=bool)
+    used_verts = loop_verts[used_loops]
+
+    # weighted average of the normals of the faces around every vertex
+    normal_sums = np.zeros((len(co), 3))
+    np.add.at(normal_sums, used_verts, face_normals[loop_faces[used_loops]] * loop_weights[used_loops, None])
+    weight_sums = np.bincount(used_verts, weights=loop_weights[used_loops], minlength=len(co))
+
+    has_offset = np.bincount(used_verts, minlength=len(co)) > 0
+    offsets = np.zeros((len(co), 3))
+    np.divide(normal_sums, weight_sums[:, None], out=offsets, where=(weight_sums > 0)[:, None])
+
+    return offsets, has_offset
+
+
+def offset_vertices(obj, distance, z_damping=1.0, face_mask=None, vertex_mask=None, weights=None,
+                    weighting='uniform'):
+    """Moves the vertices distance along their normals, only the vertices in vertex_mask (if given) with
+    faces in face_mask (if given) are moved. weights is an optional per-vertex factor on the distance."""
+    co = selection.get_vertices_co(obj).astype(np.float64)
+    loop_verts, loop_starts, loop_totals = topology.get_face_loops(obj)
+
+    offsets, has_offset = get_vertex_offsets(co, loop_verts, loop_starts, loop_totals, z_damping=z_damping,
+                                             face_mask=face_mask, weighting=weighting)
+    moved = has_offset if vertex_mask is None else has_offset & vertex_mask
+
+    factors = np.full(len(co), distance, dtype=np.float64)
+    if weights is not None:
+        factors *= np.asarray(weights, dtype=np.float64)
+
+    co[moved] += factors[moved, None] * offsets[moved]
+    selection.set_vertices_co(obj, co)
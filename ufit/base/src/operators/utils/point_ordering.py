@@ -0,0 +1,97 @@
+import numpy as np
+from mathutils import kdtree
+
+# Ordering of loose points (e.g. the grease pencil points of a trim line) into a closed path:
+# nearest neighbour chaining with a KD-tree, an optional 2-opt pass to remove crossings and
+# removal of the points that are too close to the previous point of the path.
+FILTER_WINDOW = 64
+
+
+def order_by_nearest(co, start=0):
+    """Returns the point indices in nearest neighbour order, starting at the start point"""
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    if len(co) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    kd = kdtree.KDTree(len(co))
+    for i, p_co in enumerate(co.tolist()):
+        kd.insert(p_co, i)
+    kd.balance()
+
+    visited = np.zeros(len(co), dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(len(co) - 1):
+        # closest point that is not part of the path yet
+        _, index, _ = kd.find(co[order[-1]], filter=lambda ix: not visited[ix])
+        order.append(index)
+        visited[index] = True
+
+    return np.array(order, dtype=np.int64)
+
+
+def two_opt(co, order, max_passes=10):
+    """Removes crossings of the closed path by reversing segments, as long as that shortens the path"""
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    order = np.array(order, dtype=np.int64)
+    n = len(order)
+    if n < 4:
+        return order
+
+    path_co = co[order]
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 2):
+            # edges (i, i+1) and (j, j+1) with j > i+1, the last edge closes the loop (to point 0)
+            j = np.arange(i + 2, n if i > 0 else n - 1)
+            a, b = path_co[i], path_co[i + 1]
+            c, d = path_co[j], path_co[(j + 1) % n]
+            gain = np.linalg.norm(a - b) + np.linalg.norm(c - d, axis=1) \
+                - np.linalg.norm(c - a, axis=1) - np.linalg.norm(d - b, axis=1)
+
+            k = int(np.argmax(gain))
+            if gain[k] > 1e-9:
+                # reconnect as (i, j) and (i+1, j+1)
+                order[i + 1:j[k] + 1] = order[i + 1:j[k] + 1][::-1]
+                path_co[i + 1:j[k] + 1] = path_co[i + 1:j[k] + 1][::-1]
+                improved = True
+
+        if not improved:
+            break
+
+    return order
+
+
+def filter_close_points(co, rtol, atol):
+    """Returns the indices of the points that are not close (np.isclose) to the previous kept point"""
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+
+    keep = []
+    i = 0
+    while i < len(co):
+        keep.append(i)
+
+        # jump to the first next point that is not close to the kept point, checked per window
+        j = i + 1
+        while j < len(co):
+            window = co[j:j + FILTER_WINDOW]
+            far = ~np.isclose(window, co[i], rtol=rtol, atol=atol).all(axis=1)
+            if far.any():
+                j += int(np.argmax(far))
+                break
+            j += len(window)
+        i = j
+
+    return np.array(keep, dtype=np.int64)
+
+
+def order_points(co, rtol, atol, use_two_opt=True):
+    """Orders the points into a closed path without (nearly) duplicate points, returns the ordered coordinates"""
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+
+    co = co[order_by_nearest(co)]
+    co = co[filter_close_points(co, rtol, atol)]
+    if use_two_opt:
+        co = co[two_opt(co, np.arange(len(co)))]
+
+    return co
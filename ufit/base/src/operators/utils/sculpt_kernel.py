@@ -0,0 +1,74 @@
+import numpy as np
+from . import normal_offset, selection, topology
+
+# Push/pull sculpting on arrays: the painted intensity is the displacement weight along the vertex normals and
+# the boundary is feathered with Laplacian smoothing over the cached adjacency, all in a single pass without
+# selections, operators or mode switches. The result is written back with one foreach_set.
+FEATHER_RINGS = 2
+FEATHER_FACTOR = 0.5
+FEATHER_ITERATIONS = 7
+
+
+def get_face_mask(vertex_mask, loop_verts, loop_starts):
+    # faces with all their vertices in the mask (as the face selection flushed from the vertex selection)
+    if not len(loop_starts):
+        return np.zeros(0, dtype=bool)
+
+    return np.logical_and.reduceat(vertex_mask[loop_verts], loop_starts)
+
+
+def smooth_vertices(co, indptr, indices, factors, iterations=1):
+    """Laplacian smoothing as mesh.vertices_smooth: every iteration moves each vertex its factor towards the
+    average of its neighbours (CSR adjacency). factors is a per-vertex weight, the vertices with factor 0 stay
+    in place."""
+    co = np.array(co, dtype=np.float64)
+    moving = np.flatnonzero(factors > 0)
+    if not len(moving) or not iterations:
+        return co
+
+    # only the neighbours of the moving vertices are needed
+    owners, neighbours = topology.get_neighbours(indptr, indices, moving)
+    counts = np.bincount(owners, minlength=len(moving))
+    has_neighbours = counts > 0
+    moving_factors = factors[moving[has_neighbours], None]
+
+    for _ in range(iterations):
+        sums = np.stack([np.bincount(owners, weights=co[neighbours, axis], minlength=len(moving))
+                         for axis in range(3)], axis=1)[has_neighbours]
+        co_moving = co[moving[has_neighbours]]
+        co[moving[has_neighbours]] = co_moving + moving_factors * (sums / counts[has_neighbours, None] - co_moving)
+
+    return co
+
+
+def push_pull(obj, distance, weights, pinned_mask=None, feather_rings=FEATHER_RINGS, feather_factor=FEATHER_FACTOR,
+              feather_iterations=FEATHER_ITERATIONS):
+    """Moves the vertices distance * weight along their normals and feathers the moved region feather_rings
+    beyond its boundary. The vertices in pinned_mask are neither moved nor smoothed."""
+    co = selection.get_vertices_co(obj).astype(np.float64)
+    loop_verts, loop_starts, loop_totals = topology.get_face_loops(obj)
+
+    weights = np.clip(np.asarray(weights, dtype=np.float64), 0, 1)
+    active = weights > 0
+    if pinned_mask is not None:
+        active &= ~pinned_mask
+
+    # the vertex normals of the painted faces, as the selected faces were used before
+    face_mask = get_face_mask(active, loop_verts, loop_starts)
+    offsets, has_offset = normal_offset.get_vertex_offsets(co, loop_verts, loop_starts, loop_totals,
+                                                           face_mask=face_mask)
+    moved = active & has_offset
+    co[moved] += (distance * weights[moved])[:, None] * offsets[moved]
+
+    # feather the moved region and the rings around it
+    if feather_iterations:
+        region = topology.dilate(obj, moved, rings=feather_rings, kind='faces')
+        if pinned_mask is not None:
+            region &= ~pinned_mask
+
+        indptr, indices = topology.get_adjacency(obj, kind='edges')
+        co = smooth_vertices(co, indptr, indices, np.where(region, feather_factor, 0.0), feather_iterations)
+
+    selection.set_vertices_co(obj, co)
+
+    return moved
@@ -0,0 +1,188 @@
+# Reading and writing the selection of a mesh with foreach_get/foreach_set.
+# Selections are exchanged as boolean masks or index arrays, no Python loop over the vertices is needed.
+# In edit mode the selection is read from and written to the edit mesh directly: converting the whole mesh
+# (update_from_editmode or toggling edit mode) costs more than reading the select flags of the BMesh.
+
+import bpy
+import bmesh
+import numpy as np
+
+# coordinates closer than this are considered the same vertex when selecting by coordinates
+CO_TOLERANCE = 1e-6
+
+
+def sync_edit_mesh(obj):
+    # make sure the mesh data contains the selection of edit mode
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+
+
+def get_edit_elements(obj, domain='vertices'):
+    bm = bmesh.from_edit_mesh(obj.data)
+    return {'vertices': bm.verts, 'edges': bm.edges, 'polygons': bm.faces}[domain]
+
+
+def get_vertex_count(obj):
+    return len(get_edit_elements(obj)) if obj.mode == 'EDIT' else len(obj.data.vertices)
+
+
+def get_select_mask(obj, domain='vertices'):
+    if obj.mode == 'EDIT':
+        elements = get_edit_elements(obj, domain)
+        return np.fromiter((e.select for e in elements), dtype=bool, count=len(elements))
+
+    elements = getattr(obj.data, domain)
+    mask = np.zeros(len(elements), dtype=bool)
+    elements.foreach_get('select', mask)
+
+    return mask
+
+
+def get_selected_ix(obj, domain='vertices'):
+    return np.flatnonzero(get_select_mask(obj, domain))
+
+
+def get_vertices_co(obj):
+    sync_edit_mesh(obj)
+
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get('co', co)
+
+    return co.reshape(-1, 3)
+
+
+def set_vertices_co(obj, co):
+    # the edit mesh would overwrite the mesh data, so write in object mode
+    edit_mode = obj.mode == 'EDIT'
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
+
+    obj.data.vertices.foreach_set('co', np.asarray(co, dtype=np.float32).ravel())
+    obj.data.update()
+
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
+
+
+def get_selected_vertices_co(obj):
+    mask = get_select_mask(obj)
+    return get_vertices_co(obj)[mask]
+
+
+def set_vertex_select_mask(obj, mask):
+    """Sets the selected vertices and flushes the selection to the edges and faces (as in vertex select mode)"""
+    mask = np.asarray(mask, dtype=bool)
+    if obj.mode == 'EDIT':
+        set_edit_vertex_select_mask(obj, mask)
+        return
+
+    mesh = obj.data
+
+    # edges/faces are selected when all their vertices are selected
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edge_verts)
+    edge_mask = mask[edge_verts].reshape(-1, 2).all(axis=1)
+
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    face_mask = np.logical_and.reduceat(mask[loop_verts], loop_starts) if len(loop_starts) \
+        else np.zeros(0, dtype=bool)
+
+    mesh.vertices.foreach_set('select', mask)
+    mesh.edges.foreach_set('select', edge_mask)
+    mesh.polygons.foreach_set('select', face_mask)
+
+
+def set_edit_vertex_select_mask(obj, mask):
+    # only the vertices of which the selection changes are touched, the edges and faces are flushed in C
+    bm = bmesh.from_edit_mesh(obj.data)
+    bm.verts.ensure_lookup_table()
+    current = np.fromiter((v.select for v in bm.verts), dtype=bool, count=len(bm.verts))
+
+    for ix in np.flatnonzero(current & ~mask).tolist():
+        bm.verts[ix].select = False
+    for ix in np.flatnonzero(mask & ~current).tolist():
+        bm.verts[ix].select = True
+
+    bm.select_flush(False)
+    bm.select_flush(True)
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+def select_vertices_by_ix(obj, ix, extend=False):
+    mask = get_select_mask(obj) if extend else np.zeros(get_vertex_count(obj), dtype=bool)
+    mask[np.asarray(ix, dtype=np.int64)] = True
+
+    set_vertex_select_mask(obj, mask)
+
+
+def deselect_vertices_by_ix(obj, ix):
+    mask = get_select_mask(obj)
+    mask[np.asarray(ix, dtype=np.int64)] = False
+
+    set_vertex_select_mask(obj, mask)
+
+
+def deselect_all(obj):
+    set_vertex_select_mask(obj, np.zeros(get_vertex_count(obj), dtype=bool))
+
+
+def get_co_keys(co, tolerance=CO_TOLERANCE):
+    # quantize the coordinates, so they can be compared as integer records (sortable, no float equality issues)
+    quantized = np.round(np.asarray(co, dtype=np.float64).reshape(-1, 3) / tolerance).astype(np.int64)
+    return np.ascontiguousarray(quantized).view([('x', np.int64), ('y', np.int64), ('z', np.int64)]).ravel()
+
+
+def get_co_mask(obj, co, tolerance=CO_TOLERANCE):
+    """Mask of the vertices of which the (local) coordinates are in co"""
+    vertices_co = get_vertices_co(obj)
+    if len(co) == 0 or len(vertices_co) == 0:
+        return np.zeros(len(vertices_co), dtype=bool)
+
+    return np.isin(get_co_keys(vertices_co, tolerance), get_co_keys(co, tolerance))
+
+
+def select_vertices_by_co(obj, co, extend=False):
+    mask = get_co_mask(obj, co)
+    if extend:
+        mask |= get_select_mask(obj)
+
+    set_vertex_select_mask(obj, mask)
+
+
+def tag_vertices(obj, name):
+    # integer point attribute marking all vertices of the object, the tag follows the vertices through a join
+    attr = obj.data.attributes.get(name) or obj.data.attributes.new(name=name, type='INT', domain='POINT')
+    attr.data.foreach_set('value', np.ones(len(obj.data.vertices), dtype=np.int32))
+
+
+def get_tag_mask(obj, name):
+    # in edit mode the attributes point to the BMesh layers (without data), so read in object mode
+    edit_mode = obj.mode == 'EDIT'
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
+
+    attr = obj.data.attributes.get(name)
+    values = np.zeros(len(obj.data.vertices), dtype=np.int32)
+    if attr is not None:
+        attr.data.foreach_get('value', values)
+
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
+
+    return values != 0
+
+
+def remove_tag(obj, name):
+    edit_mode = obj.mode == 'EDIT'
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
+
+    attr = obj.data.attributes.get(name)
+    if attr is not None:
+        obj.data.attributes.remove(attr)
+
+    if edit_mode:
+        bpy.ops.object.editmode_toggle()
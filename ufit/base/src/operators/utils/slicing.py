@@ -0,0 +1,108 @@
+# Slicing a mesh with horizontal planes using NumPy.
+# All requested heights are intersected in a single vectorized pass over the loop triangles,
+# which avoids adding a boolean modifier (and switching modes) for every circumference.
+
+import numpy as np
+
+
+def get_world_co(obj):
+    # make sure the mesh data contains the latest edit mode changes
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+
+    # vertex coordinates in world space
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3).astype(np.float64)
+
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    return co @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def get_triangle_indices(obj):
+    # vertex indices of the loop triangles
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    tris = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', tris)
+
+    return tris.reshape(-1, 3)
+
+
+def get_world_triangles(obj):
+    co = get_world_co(obj)
+    tris = get_triangle_indices(obj)
+
+    return co[tris]  # shape (n_triangles, 3, 3)
+
+
+def slice_triangles(tri_co, heights):
+    """Intersect the triangles with the planes z=h and return the perimeter and segments per height"""
+    heights = np.asarray(heights, dtype=np.float64)
+    order = np.argsort(heights)
+    sorted_heights = heights[order]
+
+    if not len(tri_co) or not len(heights):
+        return np.zeros(len(heights)), [np.empty((0, 2, 3)) for _ in heights]
+
+    # a triangle crosses the plane z=h when z_min <= h < z_max
+    z = tri_co[:, :, 2]
+    first = np.searchsorted(sorted_heights, z.min(axis=1), side='left')
+    last = np.searchsorted(sorted_heights, z.max(axis=1), side='left')
+    counts = last - first
+
+    # expand to (triangle, height) pairs
+    tri_ix = np.repeat(np.arange(len(tri_co)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    height_ix = np.repeat(first, counts) + offsets
+
+    tris = tri_co[tri_ix]
+    h = sorted_heights[height_ix][:, None]
+
+    # edges (0, 1), (1, 2) and (2, 0): exactly two of them cross the plane
+    start = tris
+    end = np.roll(tris, -1, axis=1)
+    above = tris[:, :, 2] > h
+    crosses = above != np.roll(above, -1, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(crosses, (h - start[:, :, 2]) / (end[:, :, 2] - start[:, :, 2]), 0.0)
+    points = start + t[:, :, None] * (end - start)
+
+    edge_ix = np.nonzero(crosses)[1].reshape(-1, 2)
+    segments = points[np.arange(len(points))[:, None], edge_ix]  # shape (n_pairs, 2, 3)
+
+    # perimeter per height
+    lengths = np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1)
+    perimeters = np.empty(len(heights))
+    perimeters[order] = np.bincount(height_ix, weights=lengths, minlength=len(heights))
+
+    # segments per height (in the order of the requested heights)
+    sort_pairs = np.argsort(height_ix, kind='stable')
+    split_at = np.searchsorted(height_ix[sort_pairs], np.arange(1, len(heights)))
+    segments_sorted = np.split(segments[sort_pairs], split_at)
+    polylines = [None] * len(heights)
+    for i, ix in enumerate(order):
+        polylines[ix] = segments_sorted[i]
+
+    return perimeters, polylines
+
+
+def measure_circumferences(obj, heights):
+    tri_co = get_world_triangles(obj)
+    return slice_triangles(tri_co, heights)
+
+
+def weld_segments(segments, decimals=6):
+    # merge the shared end points of the segments into vertices and edges
+    points = segments.reshape(-1, 3)
+    if not len(points):
+        return np.empty((0, 3)), np.empty((0, 2), dtype=np.int64)
+
+    _, first, inverse = np.unique(np.round(points, decimals), axis=0, return_index=True, return_inverse=True)
+    verts = points[first]
+    edges = inverse.reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]]  # remove segments of zero length
+
+    return verts, edges
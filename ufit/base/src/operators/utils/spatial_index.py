@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+from mathutils import kdtree
+from mathutils.bvhtree import BVHTree
+from . import selection, slicing
+
+# Spatial indices (KD-trees and BVH-trees) of the objects, built once per object and geometry.
+# The geometry fingerprint is checked on every lookup, so an index is rebuilt as soon as the mesh changed.
+# The least recently used indices are evicted when the estimated memory use exceeds the cap.
+MEMORY_CAP = 256e6  # bytes
+KD_TREE_BYTES_PER_VERTEX = 40
+BVH_TREE_BYTES_PER_POLYGON = 96
+
+# (object name, index type) -> (fingerprint, index, estimated size), least recently used first
+spatial_indices = OrderedDict()
+
+
+def clear(obj_name=None):
+    if obj_name is None:
+        spatial_indices.clear()
+        return
+
+    for key in [key for key in spatial_indices if key[0] == obj_name]:
+        del spatial_indices[key]
+
+
+def get_fingerprint(*arrays):
+    fingerprint = hashlib.sha1()
+    for a in arrays:
+        fingerprint.update(np.array(a.shape).tobytes())
+        fingerprint.update(np.ascontiguousarray(a).tobytes())
+
+    return fingerprint.hexdigest()
+
+
+def get_cached(key, fingerprint):
+    cached = spatial_indices.get(key)
+    if cached is None or cached[0] != fingerprint:
+        return None
+
+    spatial_indices.move_to_end(key)
+    return cached[1]
+
+
+def set_cached(key, fingerprint, index, size):
+    spatial_indices.pop(key, None)
+    spatial_indices[key] = (fingerprint, index, size)
+
+    # evict the least recently used indices (never the one that was just built)
+    while len(spatial_indices) > 1 and sum(s for _, _, s in spatial_indices.values()) > MEMORY_CAP:
+        spatial_indices.popitem(last=False)
+
+
+def get_kd_tree(obj):
+    """KD-tree of the (local) vertex coordinates of the object, the tree indices are the vertex indices"""
+    co = selection.get_vertices_co(obj)
+    key = (obj.name, 'kd')
+    fingerprint = get_fingerprint(co)
+
+    kd = get_cached(key, fingerprint)
+    if kd is None:
+        kd = kdtree.KDTree(len(co))
+        for i, v_co in enumerate(co.tolist()):
+            kd.insert(v_co, i)
+        kd.balance()
+        set_cached(key, fingerprint, kd, len(co) * KD_TREE_BYTES_PER_VERTEX)
+
+    return kd
+
+
+def get_bvh_tree(obj):
+    """BVH-tree of the (local) polygons of the object, the tree indices are the polygon indices"""
+    mesh = obj.data
+    co = selection.get_vertices_co(obj)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+
+    key = (obj.name, 'bvh')
+    fingerprint = get_fingerprint(co, loop_verts, loop_starts)
+
+    bvh = get_cached(key, fingerprint)
+    if bvh is None:
+        polygons = [p.tolist() for p in np.split(loop_verts, loop_starts[1:])] if len(loop_starts) else []
+        bvh = BVHTree.FromPolygons(co.tolist(), polygons)
+        set_cached(key, fingerprint, bvh, len(polygons) * BVH_TREE_BYTES_PER_POLYGON)
+
+    return bvh
+
+
+def get_triangle_bvh_tree(obj):
+    """BVH-tree of the (local) loop triangles of the object, the tree indices are the loop triangle indices"""
+    co = selection.get_vertices_co(obj)
+    triangles = slicing.get_triangle_indices(obj)
+
+    key = (obj.name, 'bvh_triangles')
+    fingerprint = get_fingerprint(co, triangles)
+
+    bvh = get_cached(key, fingerprint)
+    if bvh is None:
+        bvh = BVHTree.FromPolygons(co.tolist(), triangles.tolist(), all_triangles=True)
+        set_cached(key, fingerprint, bvh, len(triangles) * BVH_TREE_BYTES_PER_POLYGON)
+
+    return bvh
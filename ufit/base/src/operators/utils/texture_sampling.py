@@ -0,0 +1,94 @@
+import numpy as np
+from . import topology
+
+# Sampling the scan texture on the vertices with NumPy instead of baking with Cycles: the image pixels are read
+# once, every loop samples the image at its UV coordinate and the samples are averaged per vertex.
+# No render engine, material changes or subdivision are needed, so this also runs in background mode.
+
+
+def get_texture_image(material):
+    # the image of the (first) image texture node of the material
+    if material.node_tree is not None:
+        for node in material.node_tree.nodes:
+            if node.type == 'TEX_IMAGE' and node.image is not None:
+                return node.image
+
+    raise Exception(f'The material {material.name} has no image texture.')
+
+
+def get_image_pixels(image):
+    """The pixels of the image as a (height, width, channels) array, the first row is the bottom of the image"""
+    width, height = image.size
+    if not width or not height:
+        raise Exception(f'The image {image.name} has no pixels (is the file missing?).')
+
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+
+    return pixels.reshape(height, width, -1)
+
+
+def srgb_to_linear(rgb):
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def is_srgb_bytes(image):
+    # byte images keep the pixels in their color space, float images are linear
+    return not image.is_float and image.colorspace_settings.name == 'sRGB'
+
+
+def sample_bilinear(pixels, uvs):
+    """Bilinear samples (n, channels) of the pixels at the uv coordinates (n, 2), repeating the image as
+    the image texture node does"""
+    height, width = pixels.shape[:2]
+
+    # pixel centers are at half pixels
+    x = uvs[:, 0] * width - 0.5
+    y = uvs[:, 1] * height - 0.5
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+
+    x0 = x0.astype(np.int64) % width
+    y0 = y0.astype(np.int64) % height
+    x1 = (x0 + 1) % width
+    y1 = (y0 + 1) % height
+
+    bottom = pixels[y0, x0] * (1 - fx) + pixels[y0, x1] * fx
+    top = pixels[y1, x0] * (1 - fx) + pixels[y1, x1] * fx
+
+    return bottom * (1 - fy) + top * fy
+
+
+def get_loop_uvs(obj):
+    uv_layer = obj.data.uv_layers.active
+    if uv_layer is None:
+        raise Exception(f'{obj.name} has no UV map to sample the texture with.')
+
+    uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float64)
+    uv_layer.data.foreach_get('uv', uvs)
+
+    return uvs.reshape(-1, 2)
+
+
+def sample_texture_on_vertices(obj, image):
+    """Linear RGBA colors (n_vertices, 4) of the image on the vertices, averaged over the loops of every vertex.
+    Vertices without faces are black."""
+    loop_verts = topology.get_face_loops(obj)[0]
+    pixels = get_image_pixels(image)
+
+    samples = sample_bilinear(pixels, get_loop_uvs(obj))
+    rgb = samples[:, :3] if samples.shape[1] >= 3 else np.repeat(samples[:, :1], 3, axis=1)
+    if is_srgb_bytes(image):
+        rgb = srgb_to_linear(np.clip(rgb, 0, 1))
+
+    n_vertices = len(obj.data.vertices)
+    counts = np.bincount(loop_verts, minlength=n_vertices)
+    colors = np.zeros((n_vertices, 4))
+    colors[:, 3] = 1  # the emission bake does not bake the alpha
+    for channel in range(3):
+        sums = np.bincount(loop_verts, weights=rgb[:, channel], minlength=n_vertices)
+        np.divide(sums, counts, out=colors[:, channel], where=counts > 0)
+
+    return colors
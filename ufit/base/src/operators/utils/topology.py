@@ -0,0 +1,164 @@
+import numpy as np
+from . import selection, spatial_index
+
+# Mesh topology as arrays (read with foreach_get), for graph operations on the vertices without bmesh loops.
+
+# (object name, adjacency type) -> (topology fingerprint, indptr, indices), rebuilt when the topology changed
+adjacency_cache = {}
+
+
+def get_edge_vertices(obj):
+    selection.sync_edit_mesh(obj)
+
+    edges = np.empty(len(obj.data.edges) * 2, dtype=np.int32)
+    obj.data.edges.foreach_get('vertices', edges)
+
+    return edges.reshape(-1, 2)
+
+
+def get_face_loops(obj):
+    # vertex index of every loop and the first loop and number of loops of every face
+    selection.sync_edit_mesh(obj)
+    mesh = obj.data
+
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+
+    return loop_verts, loop_starts, loop_totals
+
+
+def get_edge_face_counts(obj):
+    # number of faces using each edge (every loop of a face refers to one of its edges)
+    selection.sync_edit_mesh(obj)
+
+    loop_edges = np.empty(len(obj.data.loops), dtype=np.int32)
+    obj.data.loops.foreach_get('edge_index', loop_edges)
+
+    return np.bincount(loop_edges, minlength=len(obj.data.edges))
+
+
+def get_non_manifold_edges(obj):
+    """Vertex pairs of the non-manifold edges: boundary edges (one face), wire edges and edges with more than two faces"""
+    return get_edge_vertices(obj)[get_edge_face_counts(obj) != 2]
+
+
+def label_components(n_vertices, edges):
+    """Connected component label of every vertex (union-find with pointer jumping, vectorized over all edges)"""
+    parent = np.arange(n_vertices)
+    if len(edges) == 0:
+        return parent
+
+    v0, v1 = edges[:, 0], edges[:, 1]
+    while True:
+        root0, root1 = parent[v0], parent[v1]
+        differ = root0 != root1
+        if not differ.any():
+            return parent
+
+        # union: hook the larger root onto the smaller one
+        np.minimum.at(parent, np.maximum(root0[differ], root1[differ]), np.minimum(root0[differ], root1[differ]))
+
+        # find: compress the paths until every vertex points to its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def get_components(edges):
+    """Vertex index arrays of the connected components formed by the edges, largest component first"""
+    edges = np.asarray(edges).reshape(-1, 2)
+    vertices_ix, compact_edges = np.unique(edges, return_inverse=True)
+    labels = label_components(len(vertices_ix), compact_edges.reshape(-1, 2))
+
+    # group the vertices per label
+    order = np.argsort(labels, kind='stable')
+    _, starts, counts = np.unique(labels[order], return_index=True, return_counts=True)
+    components = np.split(vertices_ix[order], starts[1:])
+
+    return [components[i] for i in np.argsort(-counts, kind='stable')]
+
+
+def get_face_vertex_pairs(loop_verts, loop_starts, loop_totals):
+    # every (ordered) pair of vertices that share a face
+    loop_faces = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    loop_offsets = np.arange(len(loop_verts)) - loop_starts[loop_faces]
+    loop_totals = loop_totals[loop_faces]
+
+    pairs = []
+    for offset in range(1, int(loop_totals.max(initial=0))):
+        has_pair = offset < loop_totals
+        other = loop_starts[loop_faces[has_pair]] + (loop_offsets[has_pair] + offset) % loop_totals[has_pair]
+        pairs.append(np.stack((loop_verts[has_pair], loop_verts[other]), axis=1))
+
+    return np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.int32)
+
+
+def get_adjacency(obj, kind='edges'):
+    """Vertex adjacency in CSR format as (indptr, indices): the neighbours of vertex i are
+    indices[indptr[i]:indptr[i + 1]]. The neighbours are connected by an edge ('edges') or share a face ('faces').
+    Cached per mesh topology."""
+    edges = get_edge_vertices(obj)
+    loop_verts, loop_starts, loop_totals = get_face_loops(obj)
+
+    key = (obj.name, kind)
+    fingerprint = spatial_index.get_fingerprint(edges, loop_verts, loop_starts)
+    cached = adjacency_cache.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1], cached[2]
+
+    if kind == 'edges':
+        pairs = np.concatenate((edges, edges[:, ::-1]))
+    elif kind == 'faces':
+        pairs = get_face_vertex_pairs(loop_verts, loop_starts, loop_totals)
+    else:
+        raise Exception(f'Unknown adjacency type {kind}.')
+
+    # unique pairs, sorted by vertex
+    n_vertices = len(obj.data.vertices)
+    keys = np.unique(pairs[:, 0].astype(np.int64) * n_vertices + pairs[:, 1])
+    rows, indices = keys // n_vertices, keys % n_vertices
+    indptr = np.searchsorted(rows, np.arange(n_vertices + 1))
+
+    adjacency_cache[key] = (fingerprint, indptr, indices)
+    return indptr, indices
+
+
+def get_neighbours(indptr, indices, vertices_ix):
+    """Neighbours of the vertices as (owners, neighbours): neighbours[i] is a neighbour of vertices_ix[owners[i]]"""
+    vertices_ix = np.asarray(vertices_ix, dtype=np.int64)
+    starts = indptr[vertices_ix]
+    counts = indptr[vertices_ix + 1] - starts
+
+    owners = np.repeat(np.arange(len(vertices_ix)), counts)
+    positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+
+    return owners, indices[positions]
+
+
+def dilate(obj, mask, rings=1, kind='faces'):
+    """Grows the vertex mask with k rings of neighbours"""
+    indptr, indices = get_adjacency(obj, kind)
+    mask = np.array(mask, dtype=bool)
+    for _ in range(rings):
+        _, neighbours = get_neighbours(indptr, indices, np.flatnonzero(mask))
+        mask[neighbours] = True
+
+    return mask
+
+
+def erode(obj, mask, rings=1, kind='edges'):
+    """Shrinks the vertex mask with k rings: the vertices with an unmasked neighbour are removed"""
+    indptr, indices = get_adjacency(obj, kind)
+    mask = np.array(mask, dtype=bool)
+    for _ in range(rings):
+        vertices_ix = np.flatnonzero(mask)
+        owners, neighbours = get_neighbours(indptr, indices, vertices_ix)
+        mask[vertices_ix[owners[~mask[neighbours]]]] = False
+
+    return mask
@@ -0,0 +1,69 @@
+import numpy as np
+from mathutils import Matrix, Vector
+from . import selection, topology
+
+# Object origins and centroids with matrix math instead of the 3D cursor and origin_set:
+# no operators, mode switches or redraws. The objects have to be in object mode (the edit mesh would
+# overwrite the transformed mesh data).
+
+
+def get_fan_triangles(obj):
+    # the polygons as triangle fans (as Blender does for the centroids), as (n, 3) vertex indices
+    loop_verts, loop_starts, loop_totals = topology.get_face_loops(obj)
+    loop_faces = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    loop_offsets = np.arange(len(loop_verts)) - loop_starts[loop_faces]
+
+    # every loop except the first and last of its polygon starts a triangle with the first loop
+    tri_loops = np.flatnonzero((loop_offsets > 0) & (loop_offsets < loop_totals[loop_faces] - 1))
+    first_loops = loop_starts[loop_faces[tri_loops]]
+
+    return np.stack((loop_verts[first_loops], loop_verts[tri_loops], loop_verts[tri_loops + 1]), axis=1)
+
+
+def get_surface_centroid(obj):
+    """Area weighted centroid of the surface in local coordinates (as ORIGIN_CENTER_OF_MASS)"""
+    co = selection.get_vertices_co(obj).astype(np.float64)
+    tri_co = co[get_fan_triangles(obj)]
+    areas = np.linalg.norm(np.cross(tri_co[:, 1] - tri_co[:, 0], tri_co[:, 2] - tri_co[:, 0]), axis=1) / 2
+
+    if areas.sum() <= 0:
+        return Vector(co.mean(axis=0)) if len(co) else Vector()
+    return Vector((tri_co.mean(axis=1) * areas[:, None]).sum(axis=0) / areas.sum())
+
+
+def get_volume_centroid(obj):
+    """Centroid of the enclosed volume in local coordinates (as ORIGIN_CENTER_OF_VOLUME), for closed meshes"""
+    co = selection.get_vertices_co(obj).astype(np.float64)
+    tri_co = co[get_fan_triangles(obj)]
+
+    # signed volumes of the tetrahedra between the triangles and the local origin
+    volumes = np.einsum('ij,ij->i', tri_co[:, 0], np.cross(tri_co[:, 1], tri_co[:, 2])) / 6
+    if abs(volumes.sum()) <= 1e-12:
+        return get_surface_centroid(obj)
+    return Vector((tri_co.sum(axis=1) / 4 * volumes[:, None]).sum(axis=0) / volumes.sum())
+
+
+def set_origin(obj, local_point):
+    """Moves the origin of the object to a point in local coordinates, without moving the geometry"""
+    translation = Matrix.Translation(Vector(local_point))
+    obj.data.transform(translation.inverted())
+    obj.matrix_basis = obj.matrix_basis @ translation
+
+
+def set_origin_world(obj, world_point):
+    # the matrix basis is up to date without a depsgraph update (the uFit objects have no parent)
+    set_origin(obj, obj.matrix_basis.inverted() @ Vector(world_point))
+
+
+def set_origins_world(objs, world_point):
+    for obj in objs:
+        set_origin_world(obj, world_point)
+
+
+def set_origin_to_center_of_mass(obj, volume=False):
+    set_origin(obj, get_volume_centroid(obj) if volume else get_surface_centroid(obj))
+
+
+def translate_objects(objs, vector):
+    for obj in objs:
+        obj.location = obj.location + Vector(vector)
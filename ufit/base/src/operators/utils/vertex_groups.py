@@ -0,0 +1,98 @@
+import numpy as np
+from . import selection, spatial_index, topology
+
+# Vertex group memberships as NumPy arrays. Blender has no bulk access to the vertex groups of the vertices,
+# so all memberships are read in a single pass and every group is then served as a mask or index array
+# (e.g. all cutout_edge_* groups at once, instead of a scan over the vertices per group).
+
+# object name -> (fingerprint, memberships), rebuilt when the mesh or the vertex group names changed.
+# Assigning vertices to an existing group does not change the fingerprint, the functions that do so invalidate.
+memberships_cache = {}
+
+
+def invalidate(obj=None):
+    if obj is None:
+        memberships_cache.clear()
+    else:
+        memberships_cache.pop(obj.name, None)
+
+
+def get_fingerprint(obj, names):
+    return spatial_index.get_fingerprint(np.array([len(obj.data.vertices)]), topology.get_edge_vertices(obj),
+                                         np.array(names, dtype=str))
+
+
+def get_memberships(obj):
+    """All vertex group memberships as (group names, vertex indices, group indices, weights), read once per mesh.
+    The arrays are shared, do not change them."""
+    selection.sync_edit_mesh(obj)
+
+    names = [vg.name for vg in obj.vertex_groups]
+    fingerprint = get_fingerprint(obj, names)
+    cached = memberships_cache.get(obj.name)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    memberships = [(v.index, g.group, g.weight) for v in obj.data.vertices for g in v.groups]
+    vertex_ixs, group_ixs, weights = zip(*memberships) if memberships else ((), (), ())
+
+    memberships = (names, np.array(vertex_ixs, dtype=np.int32), np.array(group_ixs, dtype=np.int32),
+                   np.array(weights, dtype=np.float32))
+    memberships_cache[obj.name] = (fingerprint, memberships)
+
+    return memberships
+
+
+def set_memberships(obj, names, vertex_ixs, group_ixs, weights, skip_empty=False):
+    """Adds the vertex groups with their memberships (as returned by get_memberships) to the object"""
+    for group_ix, name in enumerate(names):
+        mask = group_ixs == group_ix
+        if skip_empty and not mask.any():
+            continue
+
+        vg = obj.vertex_groups.new(name=name)
+        # vertex_groups.add only takes a single weight, add the vertices per weight
+        for weight in np.unique(weights[mask]):
+            vg.add(vertex_ixs[mask & (weights == weight)].tolist(), float(weight), 'REPLACE')
+
+    invalidate(obj)
+
+
+def get_group_masks(obj, vg_names=None):
+    """Vertex mask per vertex group (all groups if no names are given)"""
+    names, vertex_ixs, group_ixs, _ = get_memberships(obj)
+    vg_names = names if vg_names is None else vg_names
+
+    masks = {}
+    for name in vg_names:
+        mask = np.zeros(len(obj.data.vertices), dtype=bool)
+        mask[vertex_ixs[group_ixs == names.index(name)]] = True
+        masks[name] = mask
+
+    return masks
+
+
+def get_group_mask(obj, vg_names):
+    """Mask of the vertices that are in any of the vertex groups"""
+    names, vertex_ixs, group_ixs, _ = get_memberships(obj)
+
+    mask = np.zeros(len(obj.data.vertices), dtype=bool)
+    mask[vertex_ixs[np.isin(group_ixs, [names.index(name) for name in vg_names])]] = True
+
+    return mask
+
+
+def get_group_ix(obj, vg_names):
+    return np.flatnonzero(get_group_mask(obj, vg_names))
+
+
+def select_groups(obj, vg_names, extend=False):
+    mask = get_group_mask(obj, vg_names)
+    if extend:
+        mask |= selection.get_select_mask(obj)
+
+    selection.set_vertex_select_mask(obj, mask)
+
+
+def deselect_groups(obj, vg_names):
+    selection.set_vertex_select_mask(obj, selection.get_select_mask(obj) & ~get_group_mask(obj, vg_names))
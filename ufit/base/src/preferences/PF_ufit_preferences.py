@@ -42,8 +42,81 @@ class PFuFit(bpy.types.AddonPreferences):
         default=0,
     )
 
+    step_transition: bpy.props.EnumProperty(
+        name="Step Transition",
+        description="How the undo history is reset when moving to the next step",
+        items=[
+            ('in_process', 'In-Process', 'Limit the undo history without reloading the file (fast)'),
+            ('reload', 'Save & Reload', 'Save the file and reopen it to clear the undo history (slow)'),
+        ],
+        default='in_process'
+    )
+
+    save_on_step: bpy.props.BoolProperty(
+        name="Save on Step",
+        description="Save a copy of the project file when moving to the next step (In-Process only)",
+        default=True
+    )
+
+    checkpoint_format: bpy.props.EnumProperty(
+        name="Checkpoint Format",
+        description="What is written to disk for every checkpoint",
+        items=[
+            ('full', 'Full File', 'Save the complete main file'),
+            ('datablocks', 'Datablocks Only', 'Only write the uFit objects, annotations and scene properties (smaller files)'),
+        ],
+        default='full'
+    )
+
+    keep_substeps: bpy.props.IntProperty(
+        name="Keep Substeps",
+        description="Number of substep checkpoints kept per step (0 keeps all)",
+        default=0,
+        min=0
+    )
+
+    compress_checkpoints: bpy.props.BoolProperty(
+        name="Compress Older Checkpoints",
+        description="Compress all but the latest checkpoint in the background",
+        default=False
+    )
+
+    skip_backup_versions: bpy.props.BoolProperty(
+        name="Skip Backup Versions",
+        description="Do not write .blend1 backup files for checkpoints",
+        default=True
+    )
+
+    disk_budget: bpy.props.IntProperty(
+        name="Disk Budget (MB)",
+        description="Maximum size of the checkpoints of a patient, the oldest are removed first (0 is unlimited)",
+        default=0,
+        min=0
+    )
+
+    snapshot_budget: bpy.props.IntProperty(
+        name="Snapshot Memory (MB)",
+        description="Memory used to keep recent substeps for instant rollback (0 disables it)",
+        default=256,
+        min=0
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.label(text="Platform Authentication")
         layout.prop(self, "username")
         layout.prop(self, "password")
+
+        layout.label(text="Workflow")
+        layout.prop(self, "step_transition")
+        row = layout.row()
+        row.enabled = self.step_transition == 'in_process'
+        row.prop(self, "save_on_step")
+        layout.prop(self, "checkpoint_format")
+
+        layout.label(text="Checkpoints")
+        layout.prop(self, "keep_substeps")
+        layout.prop(self, "disk_budget")
+        layout.prop(self, "compress_checkpoints")
+        layout.prop(self, "skip_backup_versions")
+        layout.prop(self, "snapshot_budget")
@@ -2,7 +2,7 @@ import os
 import bpy
 import math
 import bpy.utils.previews
-from ..operators.utils import general, user_interface, color_attributes, nodes
+from ..operators.utils import general, user_interface, color_attributes, nodes, dirty_regions
 from ..operators.core import checkpoints
 from ..operators.core.sculpt import color_attr_select
 
@@ -81,6 +81,7 @@ def sculpt_mode_update(self, context):
         bpy.ops.object.mode_set(mode='SCULPT')
         context.scene.ufit_sculpt_brush = self.ufit_sculpt_brush  # trigger the sculpt_brush_update_function
         checkpoints.fill_history_with_null_operations()  # fill the history with null operations so that the user cannot switch back to vertex paint mode using crtl-z
+        dirty_regions.mark_all_dirty('uFit')  # free sculpting is not tracked, remeasure everything afterwards
 
 
 def sculpt_brush_update(self, context):
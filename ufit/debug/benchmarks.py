@@ -0,0 +1,172 @@
+# Benchmarks on the debug patients and synthetic meshes, to be run inside Blender with the uFit add-on enabled, e.g.:
+#   blender --background --python-expr "from ufit.debug import benchmarks; benchmarks.run_all('/tmp/ufit_bench')"
+
+import os
+import time
+import shutil
+import bpy
+from ..config_ufit import configure_logging, logger
+
+DEVICES = ['transtibial', 'transfemoral', 'free_sculpting']
+
+
+def get_device_consts(ufit_device):
+    # avoid circular imports
+    from ..transtibial.src.transtibial_constants import tt_path_consts, tt_ui_consts
+    from ..transfemoral.src.transfemoral_constants import tf_path_consts, tf_ui_consts
+    from ..free_sculpting.src.free_sculpting_constants import fs_path_consts, fs_ui_consts
+
+    return {
+        'transtibial': (tt_path_consts, tt_ui_consts),
+        'transfemoral': (tf_path_consts, tf_ui_consts),
+        'free_sculpting': (fs_path_consts, fs_ui_consts),
+    }[ufit_device]
+
+
+def open_debug_patient(context, workspace, ufit_device):
+    from ..base.src.operators.core.start import start_from_existing
+
+    # copy the debug patient to the workspace
+    patient_folder = f'{ufit_device}_000000_debug'
+    debug_abs_path = os.path.join(os.path.dirname(__file__), f'{ufit_device}/debug_patient/{patient_folder}')
+    destination_folder = os.path.join(workspace, patient_folder)
+    if os.path.exists(destination_folder):
+        shutil.rmtree(destination_folder)
+    shutil.copytree(debug_abs_path, destination_folder)
+
+    if not any(f.startswith('ST_') for f in os.listdir(os.path.join(destination_folder, 'checkpoints'))):
+        return False
+
+    context.scene.ufit_device_type = ufit_device
+    path_consts, ui_consts = get_device_consts(ufit_device)
+    start_from_existing(context, destination_folder + '/', path_consts, ui_consts)
+
+    return True
+
+
+def time_func(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), sum(timings) / len(timings)
+
+
+def benchmark_step_transitions(context, workspace, ufit_device, repeat=5):
+    from ..base.src.operators.core.checkpoints import set_active_step
+
+    if not open_debug_patient(context, workspace, ufit_device):
+        logger.info(f"{ufit_device}: no checkpoints in the debug patient, skipped")
+        return None
+
+    path_consts, ui_consts = get_device_consts(ufit_device)
+    ufit_prefs = bpy.context.preferences.addons['ufit'].preferences
+    prev_transition, prev_save = ufit_prefs.step_transition, ufit_prefs.save_on_step
+
+    results = {}
+    try:
+        for step_transition, save_on_step in [('reload', True), ('in_process', True), ('in_process', False)]:
+            ufit_prefs.step_transition = step_transition
+            ufit_prefs.save_on_step = save_on_step
+            step = bpy.context.scene.ufit_active_step
+
+            results[(step_transition, save_on_step)] = time_func(
+                lambda: set_active_step(bpy.context, step, path_consts, ui_consts), repeat)
+    finally:
+        ufit_prefs.step_transition = prev_transition
+        ufit_prefs.save_on_step = prev_save
+
+    for (step_transition, save_on_step), (best, mean) in results.items():
+        logger.info(f"{ufit_device} step transition {step_transition:<10} save={save_on_step!s:<5} "
+                    f"best {best * 1000:8.1f} ms, mean {mean * 1000:8.1f} ms")
+
+    return results
+
+
+def benchmark_checkpoint_writes(context, workspace, ufit_device, repeat=5):
+    from ..base.src.operators.core import checkpoint_datablocks
+
+    if not open_debug_patient(context, workspace, ufit_device):
+        logger.info(f"{ufit_device}: no checkpoints in the debug patient, skipped")
+        return None
+
+    full_path = os.path.join(workspace, f'{ufit_device}_benchmark.blend')
+    partial_path = os.path.join(workspace, f'{ufit_device}_benchmark{checkpoint_datablocks.PARTIAL_SUFFIX}')
+
+    results = {
+        'write_full': time_func(lambda: bpy.ops.wm.save_as_mainfile(filepath=full_path, copy=True), repeat),
+        'write_datablocks': time_func(lambda: checkpoint_datablocks.write_checkpoint(bpy.context, partial_path),
+                                      repeat),
+        'read_full': time_func(lambda: bpy.ops.wm.open_mainfile(filepath=full_path), repeat),
+        'read_datablocks': time_func(lambda: checkpoint_datablocks.restore_checkpoint(partial_path), repeat),
+    }
+
+    for name, (best, mean) in results.items():
+        logger.info(f"{ufit_device} checkpoint {name:<16} best {best * 1000:8.1f} ms, mean {mean * 1000:8.1f} ms")
+    logger.info(f"{ufit_device} checkpoint size full {os.path.getsize(full_path) / 1e6:.1f} MB, "
+                f"datablocks {os.path.getsize(partial_path) / 1e6:.1f} MB")
+
+    return results
+
+
+def create_grid_object(n_vertices):
+    side = int(n_vertices ** 0.5)
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=side - 1, y_subdivisions=side - 1, size=1)
+    return bpy.context.active_object
+
+
+def legacy_select_verts_by_idx(obj, vert_idx):
+    # the per-vertex loop that was replaced by the selection module
+    bpy.ops.mesh.select_all(action='DESELECT')
+    bpy.ops.object.editmode_toggle()
+    for v in obj.data.vertices:
+        if v.index in vert_idx:
+            v.select = True
+    bpy.ops.object.editmode_toggle()
+
+
+def legacy_get_selected_vertices_ix(obj):
+    import bmesh
+    bm = bmesh.from_edit_mesh(obj.data)
+    return [v.index for v in bm.verts if v.select]
+
+
+def benchmark_selection(sizes=(50_000, 500_000, 2_000_000), n_selected=100, repeat=3):
+    from ..base.src.operators.utils import selection
+
+    results = {}
+    for n_vertices in sizes:
+        bpy.ops.wm.read_homefile(use_empty=True)
+        obj = create_grid_object(n_vertices)
+        bpy.ops.object.mode_set(mode='EDIT')
+        vert_idx = list(range(0, len(obj.data.vertices), len(obj.data.vertices) // n_selected))[:n_selected]
+
+        results[n_vertices] = {
+            'select_legacy': time_func(lambda: legacy_select_verts_by_idx(obj, vert_idx), repeat),
+            'select_numpy': time_func(lambda: selection.select_vertices_by_ix(obj, vert_idx), repeat),
+            'selected_ix_legacy': time_func(lambda: legacy_get_selected_vertices_ix(obj), repeat),
+            'selected_ix_numpy': time_func(lambda: selection.get_selected_ix(obj), repeat),
+        }
+
+        for name, (best, mean) in results[n_vertices].items():
+            logger.info(f"{len(obj.data.vertices):>8} vertices {name:<20} "
+                        f"best {best * 1000:8.1f} ms, mean {mean * 1000:8.1f} ms")
+
+    return results
+
+
+def run_all(workspace, repeat=5):
+    configure_logging(enable_debug=False)
+    os.makedirs(workspace, exist_ok=True)
+
+    results = {}
+    for ufit_device in DEVICES:
+        results[ufit_device] = {
+            'step_transitions': benchmark_step_transitions(bpy.context, workspace, ufit_device, repeat=repeat),
+            'checkpoint_writes': benchmark_checkpoint_writes(bpy.context, workspace, ufit_device, repeat=repeat),
+        }
+    results['selection'] = benchmark_selection()
+
+    return results
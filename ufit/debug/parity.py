@@ -0,0 +1,184 @@
+# Parity checks of the array based implementations against the operator based code they replaced, to be run
+# inside Blender with the uFit add-on available, e.g.:
+#   blender --background --python-expr "from ufit.debug import parity; parity.run_all()"
+
+import os
+import bpy
+import bmesh
+import numpy as np
+from ..config_ufit import configure_logging, logger
+
+# checkpoints of the debug patients with circumferences measured by the boolean implementation
+CIRCUMFERENCE_CHECKPOINTS = [
+    'transtibial/debug_patient/transtibial_000000_debug/checkpoints/ST_60_circumferences_1.blend',
+]
+CIRCUMFERENCE_TOLERANCE = 1e-4  # meter
+
+# the debug patients have no UV maps and no scan images, the texture parity checks unwrap the uFit object and
+# use a generated image instead
+TEXTURE_CHECKPOINTS = [
+    'transtibial/debug_patient/transtibial_000000_debug/checkpoints/ST_50_rotate_0.blend',
+]
+TEXTURE_IMAGE_SIZE = 1024
+TEXTURE_COLOR_TOLERANCE = 0.005  # per-vertex max difference of the linear RGB channels, smooth texture
+TEXTURE_GRID_TOLERANCE = 0.2  # same, color grid texture (one pixel wide lines)
+
+
+def get_debug_path(relative_path):
+    return os.path.join(os.path.dirname(__file__), relative_path)
+
+
+def legacy_boolean_circumference(measure_obj, z):
+    # the replaced implementation: intersect a filled circle at height z with the object (FAST boolean)
+    # and sum the lengths of the boundary edges of the result
+    mesh = bpy.data.meshes.new('Circum_legacy')
+    bm = bmesh.new()
+    bmesh.ops.create_circle(bm, cap_ends=True, radius=0.2, segments=32)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    circum_obj = bpy.data.objects.new('Circum_legacy', mesh)
+    circum_obj.location = (0, 0, z)
+    bpy.context.scene.collection.objects.link(circum_obj)
+    boolean_mod = circum_obj.modifiers.new(name='Boolean', type='BOOLEAN')
+    boolean_mod.operation = 'INTERSECT'
+    boolean_mod.solver = 'FAST'
+    boolean_mod.object = measure_obj
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = circum_obj.evaluated_get(depsgraph)
+    result = evaluated.to_mesh()
+
+    co = np.empty(len(result.vertices) * 3)
+    result.vertices.foreach_get('co', co)
+    edges = np.empty(len(result.edges) * 2, dtype=np.int64)
+    result.edges.foreach_get('vertices', edges)
+    loop_edges = np.empty(len(result.loops), dtype=np.int64)
+    result.loops.foreach_get('edge_index', loop_edges)
+
+    co, edges = co.reshape(-1, 3), edges.reshape(-1, 2)
+    boundary = np.bincount(loop_edges, minlength=len(edges)) < 2
+    circumference = np.linalg.norm(co[edges[boundary, 0]] - co[edges[boundary, 1]], axis=1).sum()
+
+    evaluated.to_mesh_clear()
+    bpy.data.objects.remove(circum_obj)
+    bpy.data.meshes.remove(mesh)
+
+    return circumference
+
+
+def check_circumferences(blend_path, tolerance=CIRCUMFERENCE_TOLERANCE):
+    """Compares the slicer perimeters with the circumferences stored in the checkpoint (measured with the boolean
+    implementation when the checkpoint was made) and with the boolean implementation run now"""
+    from ..base.src.operators.utils import slicing
+
+    bpy.ops.wm.open_mainfile(filepath=blend_path)
+    scene = bpy.context.scene
+    measure_obj = bpy.data.objects.get('uFit_Measure') or bpy.data.objects['uFit']
+
+    stored = [(z, circum) for z, circum in zip(scene['ufit_circum_z_ixs'], scene['ufit_circumferences'])
+              if circum > 0]
+    heights = [z for z, _ in stored]
+    perimeters, _ = slicing.measure_circumferences(measure_obj, heights)
+
+    results = []
+    for (z, stored_circum), perimeter in zip(stored, perimeters):
+        boolean_circum = legacy_boolean_circumference(measure_obj, z)
+        results.append((z, stored_circum, boolean_circum, perimeter))
+        logger.info(f"z {z:7.3f} stored {stored_circum * 1000:7.2f} mm, boolean {boolean_circum * 1000:7.2f} mm, "
+                    f"slicer {perimeter * 1000:7.2f} mm, difference {(perimeter - stored_circum) * 1000:+6.3f} mm")
+
+    max_difference = max(abs(perimeter - stored_circum) for _, stored_circum, _, perimeter in results)
+    logger.info(f"{os.path.basename(blend_path)}: max difference {max_difference * 1000:.3f} mm "
+                f"(tolerance {tolerance * 1000:.3f} mm)")
+
+    return results, max_difference <= tolerance
+
+
+def create_test_image(name, grid=False, size=TEXTURE_IMAGE_SIZE):
+    # a smooth image (as skin on a scan texture) or Blender's color grid (sharp edges, worst case)
+    image = bpy.data.images.new(name, size, size)
+    if grid:
+        image.generated_type = 'COLOR_GRID'
+        return image
+
+    y, x = np.mgrid[0:size, 0:size] / size
+    pixels = np.stack([0.5 + 0.4 * np.sin(2 * np.pi * 4 * x),
+                       0.5 + 0.4 * np.sin(2 * np.pi * 3 * y),
+                       0.5 + 0.4 * np.sin(2 * np.pi * 2 * (x + y)),
+                       np.ones_like(x)], axis=-1)
+    image.pixels.foreach_set(pixels.astype(np.float32).ravel())
+
+    return image
+
+
+def legacy_emit_bake(context, obj, material, color_attr_name):
+    # the replaced implementation: bake the image texture with Cycles (EMIT) to a point color attribute,
+    # without the subdivision so that the colors are baked on the same vertices as they are sampled
+    from ..base.src.operators.utils import general
+
+    general.activate_object(context, obj, mode='OBJECT')
+
+    nodes = material.node_tree.nodes
+    if nodes.get('Principled BSDF') is not None:
+        nodes.remove(nodes['Principled BSDF'])
+    if nodes.get('Emission') is None:
+        nodes.new('ShaderNodeEmission')
+    material.node_tree.links.new(nodes['Image Texture'].outputs['Color'], nodes['Emission'].inputs['Color'])
+    material.node_tree.links.new(nodes['Emission'].outputs['Emission'], nodes['Material Output'].inputs['Surface'])
+
+    mesh = obj.data
+    color_attr = mesh.color_attributes.new(name=color_attr_name, type='FLOAT_COLOR', domain='POINT')
+    mesh.color_attributes.active_color = color_attr
+
+    context.scene.render.engine = 'CYCLES'
+    context.scene.render.bake.target = 'VERTEX_COLORS'
+    context.scene.cycles.bake_type = 'EMIT'
+    bpy.ops.object.bake(type='EMIT')
+
+    return color_attr
+
+
+def check_texture_sampling(blend_path, grid=False, tolerance=TEXTURE_COLOR_TOLERANCE):
+    """Compares the per-vertex colors of the texture sampling with the Cycles emission bake it replaced"""
+    from ..base.src.operators.utils import color_attributes, general
+
+    bpy.ops.wm.open_mainfile(filepath=blend_path)
+    context = bpy.context
+    obj = bpy.data.objects['uFit']
+
+    if not obj.data.uv_layers:
+        general.activate_object(context, obj, mode='EDIT')
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.uv.smart_project()
+        general.activate_object(context, obj, mode='OBJECT')
+
+    material = obj.active_material
+    material.node_tree.nodes['Image Texture'].image = create_test_image('uFit_parity', grid=grid)
+
+    color_attributes.sample_texture_to_color_attr(obj, material, 'parity_sampled')
+    sampled = color_attributes.get_colors(obj.data.color_attributes['parity_sampled'])
+    baked = color_attributes.get_colors(legacy_emit_bake(context, obj, material, 'parity_baked'))
+
+    differences = np.abs(sampled[:, :3] - baked[:, :3]).max(axis=1)
+    max_difference, mean_difference = differences.max(), differences.mean()
+    logger.info(f"{os.path.basename(blend_path)} {'color grid' if grid else 'smooth'} texture, "
+                f"{len(differences)} vertices: max difference {max_difference:.4f}, "
+                f"mean {mean_difference:.4f}, 99th percentile {np.percentile(differences, 99):.4f} "
+                f"(tolerance {tolerance})")
+
+    return (max_difference, mean_difference), max_difference <= tolerance
+
+
+def run_all():
+    configure_logging(enable_debug=False)
+
+    results = {}
+    for relative_path in CIRCUMFERENCE_CHECKPOINTS:
+        results[relative_path] = check_circumferences(get_debug_path(relative_path))
+    for relative_path in TEXTURE_CHECKPOINTS:
+        results[(relative_path, 'smooth')] = check_texture_sampling(get_debug_path(relative_path))
+        results[(relative_path, 'grid')] = check_texture_sampling(get_debug_path(relative_path), grid=True,
+                                                                  tolerance=TEXTURE_GRID_TOLERANCE)
+
+    return results
@@ -227,7 +227,8 @@ fs_operator_consts = {
     'push_pull_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -240,7 +241,8 @@ fs_operator_consts = {
     'smooth_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -253,7 +255,8 @@ fs_operator_consts = {
     'free_sculpt_checkpoint': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -1,9 +1,12 @@
 from .src.properties import properties
 from .src.workflow import operators as wf_operators
 from .src.workflow import ui as wf_ui
+from .src.transfemoral_constants import tf_path_consts
+from ..base.src.operators.core import workflow_registry
 
 
 def register():
+    workflow_registry.register_device(tf_path_consts)
     properties.register()
     wf_operators.register()
     wf_ui.register()
@@ -13,3 +16,4 @@ def unregister():
     properties.unregister()
     wf_operators.unregister()
     wf_ui.unregister()
+    workflow_registry.unregister_device(tf_path_consts)
@@ -288,7 +288,8 @@ tf_operator_consts = {
     'push_pull_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -301,7 +302,8 @@ tf_operator_consts = {
     'smooth_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -314,7 +316,8 @@ tf_operator_consts = {
     'free_sculpt_checkpoint': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -327,7 +330,8 @@ tf_operator_consts = {
     'push_pull_smooth_done': {
         'checkpoint': {
             'name': 'push_pull_smooth',  # also add a checkpoint once done
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'pull_bottom',
@@ -345,7 +349,8 @@ tf_operator_consts = {
     'pull_bottom': {
         'checkpoint': {
             'name': 'pull_bottom',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'pull_bottom',
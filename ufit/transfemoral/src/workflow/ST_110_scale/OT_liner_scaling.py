@@ -17,7 +17,7 @@ class OTLinerScaleTF(OTBaseTF, OTScale):
         if context.scene.ufit_liner_scaling != 0:
             # execute func
             scale(context)
-            remeasure_circumferences(context)  # remeasure circumferences
+            remeasure_circumferences(context, only_dirty=True)  # remeasure circumferences
 
             # return to default state
             return_to_default_state(context, 'uFit', light='STUDIO', color_type='RANDOM')
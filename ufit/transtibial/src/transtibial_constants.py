@@ -289,7 +289,8 @@ tt_operator_consts = {
     'push_pull_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -302,7 +303,8 @@ tt_operator_consts = {
     'smooth_region': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -315,7 +317,8 @@ tt_operator_consts = {
     'free_sculpt_checkpoint': {
         'checkpoint': {
             'name': 'push_pull_smooth',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'push_pull_smooth',
@@ -328,7 +331,8 @@ tt_operator_consts = {
     'push_pull_smooth_done': {
         'checkpoint': {
             'name': 'push_pull_smooth',  # also add a checkpoint once done
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'pull_bottom',
@@ -346,7 +350,8 @@ tt_operator_consts = {
     'pull_bottom': {
         'checkpoint': {
             'name': 'pull_bottom',
-            'sub_steps': True
+            'sub_steps': True,
+            'deltas': True
         },
         'next_step': {
             'name': 'pull_bottom',